@@ -9,7 +9,7 @@ __author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
 __all__ = ['setNetworkFrames','setModels','performExtraction',
            'getModelValueForNetworkChange','getModelValueForNode',
            'likelihoodPercentage','analyzeProperty','generateExtractionSubgraphs',
-           'getExtractionSubgraphFromDelta','identifyExtractionDynamics']
+           'getExtractionSubgraphFromDelta','getExtractionSubgraphAt','identifyExtractionDynamics']
 
 #    Copyright (C) 2012 by
 #    Jeffrey Schmidt <jschmid1@binghamton.edu>
@@ -20,13 +20,26 @@ __all__ = ['setNetworkFrames','setModels','performExtraction',
 
 import NetworkFrames
 import Models
+import Features
+import Sampling
 import networkx as nx
 from scipy import stats
 import random
 import csv
 import math
+import sys
+import multiprocessing
 import Utility
 
+_poolExtraction = None  # Extraction object inherited by forked model evaluation workers
+
+def _scoreFrameRange(frameRange):
+    """ Pool worker: scores the models of the inherited Extraction object on a (start, stop) range of frames.
+    Errors are returned as their messages, since the exceptions of user models need not be picklable.
+    """
+    likelihoods, errors = _poolExtraction._scoreFrames(*frameRange)
+    return likelihoods, [None if error is None else str(error) for error in errors]
+
 class propertyAvg:
     fullAvg = 'fullAvg'
     compressedAvg = 'compressedAvg'
@@ -75,12 +88,19 @@ class Extraction(object):
         """
         self.models = models
     
-    def identifyExtractionDynamics(self):
-        """Identifies the underlying rules behind extraction subgraph selection  
+    def identifyExtractionDynamics(self, workers=None):
+        """Identifies the underlying rules behind extraction subgraph selection.  The frames are walked once
+        and all the models are scored against each frame in turn.  The node features of a frame are computed
+        once and shared by the models that have a vectorized form; the other models are evaluated with
+        Model.getLikelihoodValue.
 
         Parameters
         ----------
-        None
+        workers : integer
+           Number of worker processes.  The frames are split into ranges that are scored in separate
+           processes and the partial log likelihoods of each model are summed.  None (default) or 1
+           scores the frames in this process, as does any value on Windows, where the workers cannot
+           inherit the frames.
 
         Returns
         -------
@@ -88,52 +108,94 @@ class Extraction(object):
         """
         print "Identifying Extraction Mechanism...\n"
         
-        metaCumulativeLikelihoodList = []
         self.winningModelName  = 'None'
         highestValue = float('-inf')
-        for model in self.models:
-            try:
-                print "\tAnalyzing " + model.getModelName() + "...\n",
-                networkIndex = 1
-                cummulativeLikelihood = 0.
-                cummulativeLikelihoodList = []
-                while networkIndex < len(self.network.getInputNetworks()):
-                    Gprime = self.network._getCompressedNetworkAt(networkIndex)
-                    Gprime = self.getExtractionSubgraphFromDelta(Gprime)
-                    if len(Gprime.nodes()) > 0:
-                        cummulativeLikelihood += model.getLikelihoodValue(self.network, networkIndex)
-                        cummulativeLikelihoodList.append(cummulativeLikelihood)
-                        if math.isnan(cummulativeLikelihood): 
-                            raise ZeroDivisionError, "Model returned a zero likelihood for all the nodes."                          
-                    networkIndex += 1
-                
-                print "\t" + str(cummulativeLikelihood)
+        frameCount = len(self.network.getInputNetworks())
+        if workers is not None and workers > 1 and sys.platform != 'win32' and frameCount > 2:
+            cummulativeLikelihoods, errors = self._scoreFramesInPool(frameCount, workers)
+        else:
+            cummulativeLikelihoods, errors = self._scoreFrames(1, frameCount)
+        
+        for position, model in enumerate(self.models):
+            print "\tAnalyzing " + model.getModelName() + "...\n",
+            if errors[position] is None:
+                print "\t" + str(cummulativeLikelihoods[position])
                 print "\t" + "---------------------"
-                
+                    
                 # Peek at likelihood values and numerator/denominator values.
                 #if __debug__:
-                #    metaCumulativeLikelihoodList.append(cummulativeLikelihoodList)
                 #    model._printDebugData()
                     
-                if cummulativeLikelihood > highestValue:
-                    highestValue = cummulativeLikelihood
+                if cummulativeLikelihoods[position] > highestValue:
+                    highestValue = cummulativeLikelihoods[position]
                     self.winningModelName = model.getModelName()
                     self.winningModel = model
-            except Exception,e:
+            else:
                 print "\tWARNING: An error occured while evaluating this model:"
-                print '\t  ', str(e)
+                print '\t  ', str(errors[position])
                 print "\t" + "---------------------"
-                
-        # Save debugging data to file for analysis
-        #if __debug__:
-        #    f = open('likelihood.csv','wb')
-        #    writer = csv.writer(f)        
-        #    writer.writerows(metaCumulativeLikelihoodList)   
-        #    f.close()
             
         print "Done.\n"
         print "The winning model was: " + self.winningModelName + " with a likelihood exponent of: " + str(highestValue)
         
+    def _scoreFrames(self, start, stop):
+        # Sums the log likelihood of each model over the frames in [start, stop).  A model that raises is
+        # not evaluated further and its exception is returned in its place in errors.
+        stateName = self.network.getStateName()
+        cummulativeLikelihoods = [0.] * len(self.models)
+        errors = [None] * len(self.models)
+        for networkIndex in xrange(start, stop):
+            Gprime = self.getExtractionSubgraphAt(networkIndex)
+            if len(Gprime) > 0:
+                features = None
+                inputNetwork = None
+                for position, model in enumerate(self.models):
+                    if errors[position] is not None:
+                        continue
+                    try:
+                        if model.getVectorizedModel() is None:
+                            cummulativeLikelihoods[position] += model.getLikelihoodValue(self.network, networkIndex)
+                        else:
+                            if features is None:
+                                # Held for the rest of the frame, vectorized models may read the graph from the features
+                                inputNetwork = self.network.getInputNetworkAt(networkIndex-1, False)
+                                features = Features.NodeFeatures(inputNetwork, stateName)
+                            cummulativeLikelihoods[position] += model.getLikelihoodValueFromFeatures(features, features.getRows(Gprime.nodes_iter()),
+                                                                                                 self.network, networkIndex)
+                        if math.isnan(cummulativeLikelihoods[position]):
+                            raise ZeroDivisionError, "Model returned a zero likelihood for all the nodes."
+                    except Exception,e:
+                        errors[position] = e
+        return cummulativeLikelihoods, errors
+        
+    def _scoreFramesInPool(self, frameCount, workers):
+        # Scores ranges of frames in forked worker processes and reduces the partial sums of each model.
+        # A model that failed on any range reports the error of the earliest such range.
+        global _poolExtraction
+        rangeSize = max(1, -(-(frameCount - 1) // (workers * 4)))
+        frameRanges = [(start, min(start + rangeSize, frameCount)) for start in xrange(1, frameCount, rangeSize)]
+        _poolExtraction = self
+        try:
+            pool = multiprocessing.Pool(workers)
+            try:
+                results = pool.map(_scoreFrameRange, frameRanges)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            _poolExtraction = None
+        cummulativeLikelihoods = [0.] * len(self.models)
+        errors = [None] * len(self.models)
+        for likelihoods, rangeErrors in results:
+            for position in xrange(len(self.models)):
+                if errors[position] is None:
+                    errors[position] = rangeErrors[position]
+                    cummulativeLikelihoods[position] += likelihoods[position]
+        for position in xrange(len(self.models)):
+            if errors[position] is None and math.isnan(cummulativeLikelihoods[position]):
+                errors[position] = "Model returned a zero likelihood for all the nodes."
+        return cummulativeLikelihoods, errors
+        
     def performExtraction(self, graph):
         """Performs the Extraction phase of the GNA framework.  
 
@@ -151,7 +213,7 @@ class Extraction(object):
         # Determine how many nodes to add to this extraction subgraph
         extractionCandidates = []
         while len(extractionCandidates) < 1:
-            subgraphCandidate = self.network._getExtractionSubgraphAt(random.randint(0,len(self.network.extractionSubgraphs)-1))
+            subgraphCandidate = self.network._getExtractionSubgraphAt(random.randint(0,len(self.network.extractionSubgraphs)-1), False)
             if len(subgraphCandidate.nodes()) == 0:
                 extractedSubgraph = subgraphCandidate
                 return extractedSubgraph
@@ -161,35 +223,21 @@ class Extraction(object):
         for candidate in extractionCandidates:
             extractionCandidateList.append(graph.subgraph(candidate.values()))
             
-        # Get winning model values and find total
-        total = 0.
+        # Get winning model values
         choiceList = []
-        correspondingNodeList = []
         networkVal = self.winningModel.getModel()(graph, graph, self.network.getStateName())
         for subgraph in extractionCandidateList:
             value = self.winningModel.getModel()(graph, subgraph, self.network.getStateName())/networkVal
             choiceList.append(value)
-            total += value
-            
-        # Create a roulette wheel
-        index = 0
-        accumulate = 0.
-        while index < len(choiceList):
-            accumulate += choiceList[index]/total
-            choiceList[index] = accumulate
-            index += 1
             
-        # Choose extracted subgraph  
-        randVal = random.random()
-        for index in range(0,len(choiceList)):
-            if randVal <= choiceList[index]:
-                extractedSubgraph = extractionCandidateList[index]
-                break
+        # Choose extracted subgraph with a roulette wheel
+        extractedSubgraph = extractionCandidateList[Sampling.AliasSampler(choiceList).draw()]
                         
         return extractedSubgraph
             
     def generateExtractionSubgraphs(self):
-        """ Generates the extraction subgraphs from the compressed data.  
+        """ Generates the extraction subgraphs from the compressed data.  The NetworkFrames object stores the
+        extraction subgraph of each frame as it compresses it, so only missing subgraphs are computed.
           
         Parameters
         ----------
@@ -200,20 +248,33 @@ class Extraction(object):
         None
           
         """
-        # Check to see if compression step has been perfomed
-        if len(self.network.compressedFrames) > 0:
-            # Skip first graph, since it's the initial configuration
-            index = 1
-            while index < len(self.network.compressedFrames):
-                deltaGraph = self.network._getCompressedNetworkAt(index)
-                extractionSubgraph = self.getExtractionSubgraphFromDelta(deltaGraph)
-                self.network._addExtractionSubgraph(extractionSubgraph)
-                index += 1
+        self.network.generateExtractionSubgraphs()
+                
+    def getExtractionSubgraphAt(self, index, network=None):
+        """ Returns the extraction subgraph of the compressed frame at index.  The subgraph is the one stored
+        by the NetworkFrames object when it compressed the frame, so it is never rebuilt or copied.
+          
+        Parameters
+        ----------
+        index - integer index
+         - Index of the compressed frame
+        
+        network - NetworkFrames object
+         - The frames to use, default is the NetworkFrames object set with setNetworkFrames
+        
+        Returns
+        ----------
+        extractionSubgraph - read-only Network Graph() object
+          - Graph that represents the subgraph before the rewriting even took place.
+        """
+        network = self.network if network is None else network
+        return network.getExtractionSubgraphOfFrame(index)
                 
     def getExtractionSubgraphFromDelta(self, deltaGraph):
         """ Returns an extraction subgraph based on the "delta Graph" that's passed in.  This funciton
         reconstructs the extraction subgraph from the graph that represents the change that took place between
-        one input network frame to another (t -> t+1).
+        one input network frame to another (t -> t+1).  Use getExtractionSubgraphAt for the frames of the
+        NetworkFrames object, whose subgraphs are already computed.
           
         Parameters
         ----------
@@ -225,47 +286,7 @@ class Extraction(object):
         extractionSubgraph - Network Graph() object
           - Graph that represents the subgraph before the rewriting even took place.
         """
-        extractionSubgraph = NetworkFrames.nx.DiGraph() if deltaGraph.is_directed() else NetworkFrames.nx.Graph()
-        deltaCopy = deltaGraph.copy()
-        
-        for node in deltaCopy.nodes_iter():
-            state = deltaCopy.node[node].pop(NetworkFrames.compressState.tag)
-            # We are only interested in nodes that were deleted or none
-            if state == NetworkFrames.compressState.deleted or \
-               state == NetworkFrames.compressState.none:
-                extractionSubgraph.add_node(node)
-                extractionSubgraph.node[node] = deltaCopy.node[node]
-            elif state == NetworkFrames.compressState.stateChange:
-                extractionSubgraph.add_node(node)
-                stateName = deltaCopy.node[node].pop(NetworkFrames.compressState.stateChangedName)
-                previousStateValue = deltaCopy.node[node].pop(NetworkFrames.compressState.stateChangedFrom)
-                nextStateValue = deltaCopy.node[node].pop(NetworkFrames.compressState.stateChangedTo)
-                extractionSubgraph.node[node] = deltaCopy.node[node]
-                extractionSubgraph.node[node][stateName] = previousStateValue
-            
-
-        # Look for any deleted edges that we need to add.
-        for edge in deltaCopy.edges():
-            start = edge[0]
-            end = edge[1]
-            change = deltaCopy.edge[start][end].pop(NetworkFrames.compressState.tag)
-            if change == NetworkFrames.compressState.deleted or \
-               change == NetworkFrames.compressState.none:
-                if start not in deltaCopy.node or end not in deltaCopy.node:
-                    print "Node not found prior to adding edge to extraction subgraph"
-                data = deltaCopy.edge[start][end]
-                extractionSubgraph.add_edge(start,end, data)
-            elif change == NetworkFrames.compressState.stateChange:
-                stateName = deltaCopy.edge[start][end].pop(NetworkFrames.compressState.stateChangedName)
-                previousStateValue = deltaCopy.edge[start][end].pop(NetworkFrames.compressState.stateChangedFrom)    
-                nextStateValue = deltaCopy.edge[start][end].pop(NetworkFrames.compressState.stateChangedTo)
-                extractionSubgraph.add_edge(start,end)
-                extractionSubgraph.edge[start][end]  = deltaCopy.edge[start][end]
-                extractionSubgraph.edge[start][end][stateName] = previousStateValue
-                if not extractionSubgraph.is_directed():
-                    extractionSubgraph.edge[end][start]  = deltaCopy.edge[start][end]
-                    extractionSubgraph.edge[end][start][stateName] = previousStateValue                    
-        return extractionSubgraph
+        return NetworkFrames.NetworkFrames._extractionSubgraphFromDelta(deltaGraph)
     
     def binaryStateOpposite(self, x):
         if x == 1:
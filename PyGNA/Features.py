@@ -0,0 +1,168 @@
+"""
+Node feature arrays shared by the models during Extraction identification
+
+"""
+__author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
+                            'Benjamin Bush (benjaminjamesbush@gmail.com)',
+                            'Hiroki Sayama (sayama@binghamton.edu)'])
+
+__all__ = ['NodeFeatures', 'getNodeFeatures', 'markChanged', 'getRows', 'getStateCodes', 'getGraph',
+           'getColumn']
+
+
+#    Copyright (C) 2012 by
+#    Jeffrey Schmidt <jschmid1@binghamton.edu>
+#    Benjamin Bush <benjaminjamesbush@gmail.com>
+#    Hiroki Sayama <sayama@binghamton.edu>
+#    All rights reserved.
+#    BSD license.
+
+import numpy
+import weakref
+
+_featureCache = weakref.WeakKeyDictionary()  # graph -> (version, stateName, NodeFeatures)
+_graphVersions = weakref.WeakKeyDictionary()  # graph -> number of recorded mutations
+
+class NodeFeatures(object):
+    """Per node features of one network frame stored as NumPy columns, one row per node.  The
+    features are computed once per frame and shared by every model that is scored against it.
+
+    Attributes
+    ----------
+    nodes : list
+       Node ids, in row order
+
+    degree : numpy array (float)
+       Degree of each node
+
+    stateCodes : numpy array (int) or None
+       Index of the state of each node into states, None if some node has no state
+
+    states : list
+       The distinct state values of the frame
+
+    stateCounts : numpy array (float)
+       Number of nodes holding each state
+
+    degreeTotals : numpy array (float)
+       Sum of degree+1 over the nodes holding each state
+
+    stateName : string or None
+       Name of the node state the features were built with
+
+    Example
+    -------
+
+    >>>features = Features.NodeFeatures(G, 'state')
+    >>>rows = features.getRows(subgraph.nodes())
+    >>>features.degree[rows].sum()
+    """
+    def __init__(self, G, stateName):
+        self.graph = weakref.ref(G)
+        self.stateName = stateName
+        self.columns = {}
+        self.nodes = G.nodes()
+        self.rows = dict((node, row) for row, node in enumerate(self.nodes))
+        degrees = G.degree()
+        self.degree = numpy.array([degrees[node] for node in self.nodes], dtype=float)
+        self.allRows = numpy.arange(len(self.nodes))
+        self.states = []
+        self.stateCodes = None
+        self.stateCounts = numpy.zeros(0)
+        self.degreeTotals = numpy.zeros(0)
+        nodeData = G.node
+        if all(stateName in nodeData[node] for node in self.nodes):
+            codes = {}
+            for node in self.nodes:
+                value = nodeData[node][stateName]
+                if value not in codes:
+                    codes[value] = len(self.states)
+                    self.states.append(value)
+            self.stateCodes = numpy.array([codes[nodeData[node][stateName]] for node in self.nodes], dtype=int)
+            self.stateCounts = numpy.bincount(self.stateCodes, minlength=len(self.states)).astype(float)
+            self.degreeTotals = numpy.bincount(self.stateCodes, weights=self.degree+1., minlength=len(self.states))
+
+    def getRows(self, nodes):
+        """Returns the rows of the nodes passed in.
+
+        Parameters
+        ----------
+        nodes : iterable of node ids
+
+        Returns
+        -------
+        rows : numpy array (int)
+           Row of each node.  A KeyError is raised for a node that is not in the frame.
+        """
+        try:
+            return numpy.array([self.rows[node] for node in nodes], dtype=int)
+        except KeyError, e:
+            raise KeyError("The nodeID: #%s does not exist in the graph." % str(e.args[0]))
+
+    def getStateCodes(self):
+        """Returns the state codes of the nodes, raising a KeyError if the frame has no state information."""
+        if self.stateCodes is None:
+            raise KeyError("State information does not exist for this graph.")
+        return self.stateCodes
+
+    def getGraph(self):
+        """Returns the graph the features were built from, or None if it has been garbage collected."""
+        return self.graph()
+
+    def getColumn(self, key, build):
+        """Returns an additional per node column, built the first time it is asked for and kept with
+        the features after that.
+
+        Parameters
+        ----------
+        key : hashable
+           Identifies the column
+
+        build : function
+           build() returns the column, a numpy array in row order or a dict keyed by node
+
+        Returns
+        -------
+        column : numpy array or dict
+        """
+        if key not in self.columns:
+            self.columns[key] = build()
+        return self.columns[key]
+
+def getNodeFeatures(G, stateName):
+    """Returns the NodeFeatures of G.  The features are cached per graph object until the graph is
+    garbage collected or markChanged(G) records a mutation, so every model scoring subgraphs of the same
+    graph shares one set of features.  NetworkFrames._decompress calls markChanged on the frame it
+    updates; code that mutates a graph in any other way must call it too.
+
+    Parameters
+    ----------
+    G : networkx graph
+
+    stateName : string or None
+       Name of the node state
+
+    Returns
+    -------
+    features : NodeFeatures
+    """
+    version = _graphVersions.get(G, 0)
+    cached = _featureCache.get(G)
+    if cached is not None and cached[0] == version and cached[1] == stateName:
+        return cached[2]
+    features = NodeFeatures(G, stateName)
+    _featureCache[G] = (version, stateName, features)
+    return features
+
+def markChanged(G):
+    """Records that G has been mutated, so that getNodeFeatures rebuilds its features.
+
+    Parameters
+    ----------
+    G : networkx graph
+
+    Returns
+    -------
+    None
+    """
+    _graphVersions[G] = _graphVersions.get(G, 0) + 1
@@ -6,7 +6,8 @@ __author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
                             'Benjamin Bush (benjaminjamesbush@gmail.com)',
                             'Hiroki Sayama (sayama@binghamton.edu)'])
 
-__all__ = ['addModel', 'getModelName','getModel','getLikelihoodValue']
+__all__ = ['NetworkNormalizer', 'ConstantNormalizer', 'addModel', 'getModelName','getModel','getVectorizedModel','getLikelihoodValue',
+           'getLikelihoodValueFromFeatures']
 
 
 #    Copyright (C) 2012 by
@@ -20,16 +21,93 @@ import NetworkFrames
 import Extraction
 import math
 import csv
+import collections
+
+class NetworkNormalizer(object):
+    """Running value of a model over a whole input network frame, kept up to date from the compressed frames.
+    The model value of a network must be a function of a sum of per node contributions:
+    contribution(G, node, stateName) returns a dict of additive statistics for one node and
+    normalize(statistics) turns the summed statistics into the model value of the network.
+
+    Moving from frame t-1 to frame t only recomputes the contributions of the nodes the compressed frame
+    t touches, i.e. nodes that were added, deleted or changed state and the end points of added, deleted
+    or changed edges, so the value is updated in O(|delta|) instead of O(|V|+|E|).  Any other access
+    recomputes the value from scratch.
+    """
+    def __init__(self, contribution, normalize):
+        self.contribution = contribution
+        self.normalize = normalize
+        self.frames = None
+        self.index = None
+        self.contributions = {}
+        self.statistics = collections.Counter()
+
+    def getValue(self, netFrames, index):
+        """Returns the model value of the input network frame at index of netFrames."""
+        stateName = netFrames.getStateName()
+        G = netFrames.getInputNetworkAt(index, False)
+        frames = (netFrames.inputFrames, netFrames.compressedFrames)
+        current = self.frames is not None and self.frames[0] is frames[0] and self.frames[1] is frames[1]
+        # A model error part way through an update leaves the statistics unusable
+        self.frames = None
+        if current and self.index == index - 1 and index > 0:
+            delta = netFrames._getCompressedNetworkAt(index, False)
+            touched = set(node for node, data in delta.node.iteritems()
+                          if data[NetworkFrames.compressState.tag] != NetworkFrames.compressState.none)
+            for start, end, data in delta.edges_iter(data=True):
+                if data[NetworkFrames.compressState.tag] != NetworkFrames.compressState.none:
+                    touched.add(start)
+                    touched.add(end)
+            for node in touched:
+                self._update(G, node, stateName)
+        elif not current or self.index != index:
+            self.contributions = {}
+            self.statistics = collections.Counter()
+            for node in G.nodes_iter():
+                self._update(G, node, stateName)
+        self.frames = frames
+        self.index = index
+        return self.normalize(self.statistics)
+
+    def _update(self, G, node, stateName):
+        # Replaces the contribution of node by its contribution in G, dropping it if node is not in G
+        if node in self.contributions:
+            self.statistics.subtract(self.contributions.pop(node))
+        if node in G.node:
+            contribution = self.contribution(G, node, stateName)
+            self.contributions[node] = contribution
+            self.statistics.update(contribution)
+
+class ConstantNormalizer(object):
+    """Model value of a whole input network frame for models whose value is the same for every network,
+    e.g. models that normalize each node by a total over the whole network.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def getValue(self, netFrames, index):
+        """Returns the model value of the input network frame at index of netFrames."""
+        return self.value
 
 class Model(object):
     def __init__(self):
         self.modelFunction = None
+        self.vectorizedFunction = None
+        self.normalizer = None
         self.modelName = ''
         self.cumulativeExtraction = []
         self.cumulativeNetwork = []
         
-    def __init__(self, model, name):
+    def __init__(self, model, name, vectorized=None, incremental=None, networkValue=None):
         self.modelFunction = model
+        # Optional form of the model evaluated on Features.NodeFeatures arrays: vectorized(features, rows)
+        self.vectorizedFunction = vectorized
+        # Optional (contribution, normalize) pair, see NetworkNormalizer, used to keep the model value of the
+        # whole input network up to date from frame to frame
+        self.normalizer = None if incremental is None else NetworkNormalizer(*incremental)
+        # Optional model value shared by every whole input network, see ConstantNormalizer
+        if networkValue is not None:
+            self.normalizer = ConstantNormalizer(networkValue)
         self.modelName = name
         self.cumulativeExtraction = []
         self.cumulativeNetwork = []    
@@ -87,6 +165,21 @@ class Model(object):
         """        
         return self.modelFunction
     
+    def getVectorizedModel(self):
+        """Accessor that returns the vectorized form of the model function
+        
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        vectorizedFunction: function object or None
+           function(features, rows) that returns the model value of the nodes at rows of a
+           Features.NodeFeatures object, or None if the model has no vectorized form
+        """
+        return self.vectorizedFunction
+    
     def getLikelihoodValue(self, netFrames, index):
         """This function calculates a liklihood value for the network at the index passed in using
         the self.modelFunction that is defined
@@ -104,9 +197,8 @@ class Model(object):
         modelFunction: function object
            returns the function defined for this model
         """            
-        extractionSubgraph = netFrames._getCompressedNetworkAt(index)
-        extractionSubgraph = Extraction.Extraction().getExtractionSubgraphFromDelta(extractionSubgraph)        
-        inputNetwork = netFrames.getInputNetworkAt(index-1)
+        extractionSubgraph = Extraction.Extraction().getExtractionSubgraphAt(index, netFrames)
+        inputNetwork = netFrames.getInputNetworkAt(index-1, False)
         
         modelExtractionVal = 0.
         #for node in extractionSubgraph.nodes():
@@ -116,8 +208,46 @@ class Model(object):
         modelNetworkVal = 0.
         #for node in inputNetwork.nodes():
          #   modelNetworkVal += self.getModel()(inputNetwork, node, netFrames.getStateName())
-        modelNetworkVal = self.getModel()(inputNetwork, inputNetwork, netFrames.getStateName())
+        if self.normalizer is None:
+            modelNetworkVal = self.getModel()(inputNetwork, inputNetwork, netFrames.getStateName())
+        else:
+            modelNetworkVal = self.normalizer.getValue(netFrames, index-1)
         
+        return self._logLikelihood(modelExtractionVal, modelNetworkVal)
+    
+    def getLikelihoodValueFromFeatures(self, features, rows, netFrames=None, index=None):
+        """Calculates the same likelihood value as getLikelihoodValue with the vectorized model function,
+        from node features that are computed once per frame and shared by all the models
+                
+        Parameters
+        ----------
+        features: Features.NodeFeatures object
+           Features of the input network frame before the extraction
+           
+        rows: numpy array (int)
+           Rows of the nodes of the extraction subgraph in features
+           
+        netFrames: NetworkFrames object, optional
+           The NetworkFrames object the features were built from
+           
+        index: integer, optional
+           Index of the extraction, the features are of the input network at index-1.  When netFrames and
+           index are passed and the model has a normalizer, the model value of the whole network comes from
+           the normalizer instead of being recomputed from the features
+
+        Returns
+        -------
+        logLikelihoodVal: float
+           log likelihood of the extraction subgraph under the model
+        """
+        modelExtractionVal = self.vectorizedFunction(features, rows)
+        if self.normalizer is None or netFrames is None:
+            modelNetworkVal = self.vectorizedFunction(features, features.allRows)
+        else:
+            modelNetworkVal = self.normalizer.getValue(netFrames, index-1)
+        return self._logLikelihood(modelExtractionVal, modelNetworkVal)
+    
+    def _logLikelihood(self, modelExtractionVal, modelNetworkVal):
         logModelExtractionVal = float('-inf') if modelExtractionVal == 0. else math.log(modelExtractionVal)
         
         self.cumulativeExtraction.append(logModelExtractionVal)
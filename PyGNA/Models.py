@@ -17,6 +17,7 @@ __all__ = ['addModel','getModelList','addDefaultModelsToList']
 #    BSD license.
 
 import Model
+import Features
 
 class Models(object):
     def __init__(self):
@@ -65,41 +66,36 @@ class Models(object):
             
             stateVal = 0.001
             if state in G.node[nodeID]:
-                if nodeID in G.nodes():
-                    if state in G.node[nodeID]:
-                        stateVal = 0.001 if G.node[nodeID][state] == 0 else G.node[nodeID][state]
-                else: raise KeyError, "The nodeID: #%d does not exist in the graph." %nodeID
+                stateVal = 0.001 if G.node[nodeID][state] == 0 else G.node[nodeID][state]
             else: raise KeyError, "State information does not exist for this graph."
             
             return stateVal
         
+        # Vectorized forms of the models, evaluated on Features.NodeFeatures arrays
+        def degreeVectorized(features, rows):
+            degreeVal = features.degree[rows].sum()
+            return 0.001 if degreeVal == 0 else degreeVal
+        
+        def ImprovedStateVectorized(features, rows):
+            codes = features.getStateCodes()[rows]
+            return (1.0/features.stateCounts[codes]).sum() / len(features.states)
+        
+        def degreeStateVectorized(features, rows):
+            codes = features.getStateCodes()[rows]
+            return ((features.degree[rows]+1.0)/features.degreeTotals[codes]).sum() / len(features.states)
+        
+        # The state histogram and per state degree totals of G are built in one pass by Features.getNodeFeatures,
+        # after which scoring a subgraph only touches its own nodes
         def ImprovedState(G, subgraph, state):
-            states = [G.node[node][state] for node in G.nodes()]
-            uniqueStates = set(states)
-            uniqueStateOccuranceMap = {}
-            for states in uniqueStates:
-                uniqueStateOccuranceMap[states] = len([node for node in G.nodes() if G.node[node][state] == states])
-                
-            stateCheck = [(state in G.node[x]) for x in subgraph.nodes()]
-            if False in stateCheck:
-                raise KeyError, "State information does not exist for this graph."
-            else:
-                retVal = 0.
-                for node in subgraph.nodes():
-                    currentState = G.node[node][state]
-                    retVal += (1.0/uniqueStateOccuranceMap[currentState] ) * ( 1.0/len(uniqueStates))
-                    
-                return retVal
-                
+            features = Features.getNodeFeatures(G, state)
+            return ImprovedStateVectorized(features, features.getRows(subgraph.nodes_iter()))
         
         def degree(G, subgraph, state):
             degreeVal = 0.
-            nodeTest = [node in G.nodes() for node in subgraph.nodes()]
-            if False in nodeTest:
-                raise KeyError, "The nodeID: #%d does not exist in the graph." %subgraph.nodes()[nodeTest.index(False)]  
-            else: 
-                for nodes in subgraph:
-                    degreeVal += G.degree(nodes)
+            for node in subgraph:
+                if node not in G.node:
+                    raise KeyError, "The nodeID: #%d does not exist in the graph." %node
+                degreeVal += G.degree(node)
                 
             degreeVal = 0.001 if degreeVal == 0 else degreeVal
             
@@ -107,7 +103,7 @@ class Models(object):
         
         def stateDegree(G, nodeID, state):
             stateDegreeVal = 0.
-            if nodeID in G.nodes():
+            if nodeID in G.node:
                 if state in G.node[nodeID]:
                     stateVal = 0.001 if G.node[nodeID][state] == 0 else G.node[nodeID][state]
                     degreeVal = 0.001 if G.degree(nodeID) == 0 else G.degree(nodeID)
@@ -120,34 +116,28 @@ class Models(object):
             return stateDegreeVal
         
         def degreeState(G, subgraph, state):
-            nodeTest = [node in G.nodes() for node in subgraph.nodes()]
-            if False in nodeTest:
-                raise KeyError, "The nodeID: #%d does not exist in the graph." %subgraph.nodes()[nodeTest.index(False)]  
-            else:
-                stateCheck = [(state in G.node[x]) for x in subgraph.nodes()]
-                if False in stateCheck:
-                    raise KeyError, "State information does not exist for this graph."
-                else:
-                    retVal = 0.
-                    states = [G.node[node][state] for node in G.nodes()]
-                    uniqueStates = set(states)
-                    degreeTotalForStateMap = {}
-                    for states in uniqueStates:
-                        degreeTotalForStateMap[states] = sum([G.degree(node)+1 for node in G.nodes() if G.node[node][state] == states])
-                        
-                    for node in subgraph:
-                        currentState = G.node[node][state]
-                        retVal += ((G.degree(node)+1.0)/degreeTotalForStateMap[currentState] ) * ( 1.0/len(uniqueStates))
-                    return retVal
-                
-                              
+            features = Features.getNodeFeatures(G, state)
+            return degreeStateVectorized(features, features.getRows(subgraph.nodes_iter()))
         
         def baseCase(G, nodeID, state):
             return 1
         
-        degreeModel = Model.Model(degree, 'degree')
-        stateModel = Model.Model(ImprovedState, 'state')
-        degreeStateModel = Model.Model(degreeState, 'degreeState')
+        # Incremental form of the degree model, giving the value of a whole network as a function of
+        # summed per node contributions (see Model.NetworkNormalizer)
+        def degreeContribution(G, nodeID, state):
+            return {'degree': G.degree(nodeID)}
+        
+        def degreeNormalize(statistics):
+            degreeVal = float(statistics['degree'])
+            return 0.001 if degreeVal == 0 else degreeVal
+        
+        degreeModel = Model.Model(degree, 'degree', degreeVectorized,
+                                  (degreeContribution, degreeNormalize))
+        # Every node is divided by the total of its state (its state count, or the degree+1 total of its
+        # state) and each state is weighted by 1/#states, so over a whole network each state sums to
+        # 1/#states and the network value of these two models is always 1
+        stateModel = Model.Model(ImprovedState, 'state', ImprovedStateVectorized, networkValue=1.0)
+        degreeStateModel = Model.Model(degreeState, 'degreeState', degreeStateVectorized, networkValue=1.0)
         baseModel = Model.Model(baseCase, 'baseCase')
         self.addModel(degreeModel)
         self.addModel(stateModel)
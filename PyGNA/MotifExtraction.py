@@ -24,6 +24,7 @@ import Utility
 import copy
 import Display
 import math
+import Sampling
 from GTrie import *
 
 class RuleCategory:
@@ -43,9 +44,12 @@ class MotifExtraction(object):
         self.sample_num = 0
         self.sample_motifs = []
         self.extractionMap = []
+        self.extractionClasses = {}  # Canonical certificate of each left hand side -> its index in extractionMap
         self.extractionPool = {}
         self.gtrieExtractionPool = {}
         self.proportionalSelection = []
+        self.extractionSampler = None  # Sampling.FenwickSampler over the non-empty extraction pools
+        self.gtrieExtractionSampler = None  # Sampling.FenwickSampler over the non-empty GTrie extraction pools
         self.display = Display.display()
         self.gtrie = GTrie.GTrie()
         self.gtrie.createGTrieWithFour()
@@ -251,7 +255,7 @@ class MotifExtraction(object):
         print "Sampling Network...",
         self.setSampleNum(sampleNumber)
         self.extractionMap = []
-        sampleTrie = GTrie.GTrie()
+        self.extractionClasses = {}
         sample = self.sampleCompressedNetworkAt(networkIndex)
         sampleCount = 0
         while sampleCount < sampleNumber:
@@ -271,28 +275,8 @@ class MotifExtraction(object):
             if len(lefthandside.nodes()) == 0 or (len(components) > 1 and sum(component_len) > 1):
                 continue
                     
-            isomorphfound = False
-            sampleTrie.GTrieMatch(lefthandside, [1,1,1,1,1], labels=True, states=True)
-            matches = sampleTrie.getMatches(labels=True)
-            for key in matches:
-                if self.util.isIsomorphicFast(self.extractionMap[key][0], lefthandside):
-                    self.extractionMap[key][1].append(sampleMotif)
-                    isomorphfound = True
-                    sampleCount += 1
-                    break
-                
-            ############
-            if not isomorphfound:
-                for element in self.extractionMap:
-                    if self.util.isIsomorphicFast(element[0], lefthandside):
-                        print "Error found in GTrie isomorphism."
-            ############
-            
-            if not isomorphfound:              
-                addExtraction = [lefthandside,[sampleMotif]]
-                sampleTrie.GTrieInsert(lefthandside, label=len(self.extractionMap), states=True)
-                self.extractionMap.append(addExtraction)
-                sampleCount += 1
+            self._addToExtractionMap(lefthandside, sampleMotif)
+            sampleCount += 1
         
         #Add exclusion list to extraction map
         for extraction in self.extractionMap:
@@ -322,7 +306,6 @@ class MotifExtraction(object):
         self.setSampleNum(sampleNumber)
         self.sampleCompressedNetworks()
         #Roulette wheel selection
-        sampleTrie = GTrie.GTrie()
         numNodeList = []
         numNodeList.append(float(scipymisc.comb(len(self.network.getInputNetworkAt(0, False).nodes()), motifSize)))
         for i in range(1, len(self.network.getInputNetworks())-2):
@@ -377,28 +360,8 @@ class MotifExtraction(object):
                     edgedata = inputnetwork.edge[start][end]
                     lefthandside.add_edge(start, end, edgedata)'''
                     
-            isomorphfound = False
-            sampleTrie.GTrieMatch(lefthandside, [1,1,1,1,1], labels=True, states=True)
-            matches = sampleTrie.getMatches(labels=True)
-            for key in matches:
-                if self.util.isIsomorphicFast(self.extractionMap[key][0], lefthandside):
-                    self.extractionMap[key][1].append(sampleMotif)
-                    isomorphfound = True
-                    sampleCount += 1
-                    break
-                
-            ############
-            if not isomorphfound:
-                for element in self.extractionMap:
-                    if self.util.isIsomorphicFast(element[0], lefthandside):
-                        print "Error found in GTrie isomorphism."
-            ############
-            
-            if not isomorphfound:              
-                addExtraction = [lefthandside,[sampleMotif]]
-                sampleTrie.GTrieInsert(lefthandside, label=len(self.extractionMap), states=True)
-                self.extractionMap.append(addExtraction)
-                sampleCount += 1
+            self._addToExtractionMap(lefthandside, sampleMotif)
+            sampleCount += 1
         
         #Add exclusion list to extraction map
         for extraction in self.extractionMap:
@@ -434,7 +397,7 @@ class MotifExtraction(object):
         inputNodeData = {tag:0 for tag in NetworkFrames.compressState.allStates}
         inputEdgeData = {tag:0 for tag in NetworkFrames.compressState.allStates}
         for index in range(1, len(self.network.compressedFrames)-1):
-            frame = self.network._getCompressedNetworkAt(index)
+            frame = self.network._getCompressedNetworkAt(index, False)
             for node in frame.node:
                 nodeTag = frame.node[node][NetworkFrames.compressState.tag]
                 inputNodeData[nodeTag] += 1
@@ -498,7 +461,7 @@ class MotifExtraction(object):
         inputNodeTotal = 0.
         inputNodeData = {tag:0 for tag in NetworkFrames.compressState.allStates}
         inputEdgeData = {tag:0 for tag in NetworkFrames.compressState.allStates}
-        frame = self.network._getCompressedNetworkAt(index)
+        frame = self.network._getCompressedNetworkAt(index, False)
         for node in frame.node:
             nodeTag = frame.node[node][NetworkFrames.compressState.tag]
             if nodeTag != NetworkFrames.compressState.none:
@@ -617,6 +580,8 @@ class MotifExtraction(object):
         
     def generateProportionalSelectionData(self):
         self.proportionalSelection = []
+        self.extractionSampler = None
+        self.gtrieExtractionSampler = None
         for element in self.extractionMap:
             if self.proportionalSelection == []:
                 self.proportionalSelection.append([element[0], len(element[1]), 0])
@@ -638,12 +603,21 @@ class MotifExtraction(object):
     def selectRewritingRule(self, subgraph):
         returnGraph = None
         
-        for element in self.extractionMap:
-            if self.util.isIsomorphicFast(element[0], subgraph):
-                returnGraph = copy.deepcopy(random.choice(element[1]))
-                break
+        index = self.extractionClasses.get(self.util.canonicalCertificate(subgraph))
+        if index is not None:
+            returnGraph = copy.deepcopy(random.choice(self.extractionMap[index][1]))
         return returnGraph
     
+    def _addToExtractionMap(self, lefthandside, sampleMotif):
+        # Files sampleMotif under the entry of extractionMap whose left hand side is isomorphic to lefthandside,
+        # found by its canonical certificate, and adds a new entry if there is none
+        certificate = self.util.canonicalCertificate(lefthandside)
+        if certificate in self.extractionClasses:
+            self.extractionMap[self.extractionClasses[certificate]][1].append(sampleMotif)
+        else:
+            self.extractionClasses[certificate] = len(self.extractionMap)
+            self.extractionMap.append([lefthandside,[sampleMotif]])
+    
     def selectRewritingRuleGTrie(self, subgraph):
         rewritingRule = None
         if self.util.isIsomorphicFast(self.extractionMap[subgraph[1]][0], subgraph[0]):
@@ -653,10 +627,10 @@ class MotifExtraction(object):
                 rewritingSubgraph = copy.deepcopy(self.extractionMap[subgraph[1]][1][selection])
                 delta = self.rewriting.makeNodeLabelsDisjoint(subgraph[0], rewritingSubgraph)
                 associatedExtraction = self.prev_extraction.getExtractionSubgraphFromDelta(delta)
-                mapping = self.util.findSubgraphInstances(subgraph[0], associatedExtraction)
-                if len(mapping) < 1:
+                mapping = next(self.util.iterSubgraphInstances(subgraph[0], associatedExtraction, 1), None)
+                if mapping is None:
                     print "Error in mapping rewriting during simulation!"
-                rewritingRule = nx.relabel_nodes(delta,mapping[0],copy=True) if len(mapping) > 0 else delta
+                rewritingRule = nx.relabel_nodes(delta,mapping,copy=True) if mapping is not None else delta
                 rewritingRule = None if self.isRewritingRuleInUsed(rewritingRule) else rewritingRule
                 candidateList.remove(selection)
         else:
@@ -680,6 +654,7 @@ class MotifExtraction(object):
         import time
         totalstart = time.time()
         self.extractionPool = {}
+        self.extractionSampler = None
         connected = 0
         
         #***************************************
@@ -717,6 +692,7 @@ class MotifExtraction(object):
         self.simulationgtrie.GTrieMatch(network, [1,1,1,math.sqrt(value),math.sqrt(value)], labels=True, states=True)
         print "Done."
         self.gtrieExtractionPool = self.simulationgtrie.getMatches(labels=True)
+        self.gtrieExtractionSampler = None
         for keys in self.gtrieExtractionPool.iterkeys():
             print len(self.gtrieExtractionPool[keys])
         
@@ -726,40 +702,42 @@ class MotifExtraction(object):
             subgraph = self.extractionMap[index][0]
             self.simulationgtrie.GTrieInsert(subgraph, index, states=True)
                 
+    def _getExtractionSampler(self):
+        # Weights each extraction map entry by its number of rewriting rules, leaving out empty pools
+        if self.extractionSampler is None:
+            self.extractionSampler = Sampling.FenwickSampler(
+                [len(element[1]) if len(self.extractionPool.get(element[0], [])) else 0 for element in self.extractionMap])
+        return self.extractionSampler
+    
+    def _getGTrieExtractionSampler(self):
+        # Weights each extraction map entry by its number of rewriting rules, leaving out empty GTrie pools
+        if self.gtrieExtractionSampler is None:
+            self.gtrieExtractionSampler = Sampling.FenwickSampler(
+                [len(self.extractionMap[index][1]) if len(self.gtrieExtractionPool.get(index, [])) else 0
+                 for index in range(len(self.extractionMap))])
+        return self.gtrieExtractionSampler
+                
     def chooseExtractionSubgraph(self, network):
-        #Select extraction subgraph based on input network probability distribution
-        returnSubgraph = None
-        rand = random.random() * self.proportionalSelection[-1][1]
-        for candidate in self.proportionalSelection:
-            val = candidate[1]
-            if rand <= val and len(self.extractionPool[candidate[0]]):
-                index = random.randint(0, len(self.extractionPool[candidate[0]])-1)
-                subgraphMap = self.extractionPool[candidate[0]].pop(index)
-                returnSubgraph = network.subgraph(subgraphMap.values()).copy()
-                candidate[2] += 1
-                break
-        
-        if returnSubgraph == None:
-            self.chooseExtractionSubgraph(network)
+        #Select extraction subgraph based on input network probability distribution, among the non-empty pools
+        sampler = self._getExtractionSampler()
+        if sampler.getTotal() == 0:
+            return None
+        selected = sampler.draw()
+        candidate = self.proportionalSelection[selected]
+        pool = self.extractionPool[candidate[0]]
+        subgraphMap = pool.pop(random.randint(0, len(pool)-1))
+        if len(pool) == 0:
+            sampler.update(selected, 0)
+        candidate[2] += 1
             
-        return returnSubgraph
+        return network.subgraph(subgraphMap.values()).copy()
     
     def chooseExtractionSubgraphGTrie(self, network): 
-        #Select extraction subgraph based on input network probability distribution
-        returnSubgraph = None
-        returnIndex = -1
-        choice = -1
-        while returnIndex == -1:
-            rand = random.random() * self.proportionalSelection[-1][1]
-            for index in range(len(self.proportionalSelection)):
-                val = self.proportionalSelection[index][1]
-                if index in self.gtrieExtractionPool and rand <= val and len(self.gtrieExtractionPool[index]):
-                    pick = random.randint(0, len(self.gtrieExtractionPool[index])-1)
-                    choice = pick
-                    returnSubgraph = self.gtrieExtractionPool[index][pick]
-                    returnIndex = index
-                    self.proportionalSelection[index][2] += 1
-                    break
+        #Select extraction subgraph based on input network probability distribution, among the non-empty pools
+        returnIndex = self._getGTrieExtractionSampler().draw()
+        choice = random.randint(0, len(self.gtrieExtractionPool[returnIndex])-1)
+        returnSubgraph = self.gtrieExtractionPool[returnIndex][choice]
+        self.proportionalSelection[returnIndex][2] += 1
             
         return (returnSubgraph,returnIndex,choice)
     
@@ -767,6 +745,8 @@ class MotifExtraction(object):
         self.gtrieExtractionPool[subgraphTuple[1]].pop(subgraphTuple[2])
         if len(self.gtrieExtractionPool[subgraphTuple[1]]) == 0:
             self.rebalanceProportionalSelectionData(subgraphTuple[1])
+            if self.gtrieExtractionSampler is not None:
+                self.gtrieExtractionSampler.update(subgraphTuple[1], 0)
 
     def getSizeOfExtractionSubgraphGTrieMatch(self):
         length = 0
@@ -6,11 +6,14 @@ __author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
                             'Benjamin Bush (benjaminjamesbush@gmail.com)',
                             'Hiroki Sayama (sayama@binghamton.edu)'])
 
-__all__ = ['readGraphML', 'readCompressedGraphML', 'addGraph',
+__all__ = ['readGraphML', 'iterGraphML', 'readCompressedGraphML', 'saveFrames', 'loadFrames',
+           'convertGraphML', 'addGraph',
            'writeDecompressedFrames', 'writeCompressedFrames',
            'compressNetworkFrames', 'decompressNetworkFrames',
            'getInputNetworks', 'getInputNetworkAt',
-           'getExtractionSubgraphs', 'writeGraph', 'getStateName']
+           'getExtractionSubgraphs', 'getExtractionSubgraphOfFrame', 'generateExtractionSubgraphs',
+           'getExtractionClasses',
+           'writeGraph', 'getStateName']
 
 
 #    Copyright (C) 2012 by
@@ -22,7 +25,19 @@ __all__ = ['readGraphML', 'readCompressedGraphML', 'addGraph',
 
 import networkx as nx
 import copy
+import sys
+import bisect
+import collections
+import itertools
+import math
+import random
+import marshal
+import multiprocessing
+import numpy
 import graphMLRead
+import frameArchive
+import Features
+import Utility
 import Display
 
 class compressState:
@@ -49,20 +64,423 @@ class processState:
     betweenness = 'BetweennessCentrality'
     allStates = [degree,degreeIn,degreeOut,cluster,closeness,betweenness]
 
+class centralityMode:
+    """ 'Enum' Class used to select how processNetworkFrames computes the centralities of each frame.
+    exact recomputes them on the whole frame, incremental recomputes them only on the connected
+    components that changed since the previous frame, and approximate also estimates the betweenness of
+    those components from a sample of pivots.
+    """
+    exact = 'exact'
+    incremental = 'incremental'
+    approximate = 'approximate'
+    allModes = [exact, incremental, approximate]
+
+class CheckpointedFrames(object):
+    """ Sequence standing in for NetworkFrames.inputFrames when the input was ingested with
+    ingestGraphML or converted with setCheckpointInterval.  Full snapshots are only kept at the checkpoint indices; every other frame
+    is rebuilt on demand by decompressing the compressed frames that follow the closest checkpoint.
+    Frames can only be appended, which stores the change from the last frame as a new compressed frame.
+    """
+    def __init__(self, networkFrames):
+        self.network = networkFrames
+
+    def __len__(self):
+        return len(self.network.compressedFrames)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Invalid index value')
+        return self.network._reconstructInputFrame(index)
+
+    def __iter__(self):
+        # Walk the deltas once instead of rebuilding every frame from its checkpoint
+        if len(self) > 0:
+            focus_frame = self.network.compressedFrames[0].copy()
+            yield focus_frame.copy()
+            for index in xrange(1, len(self)):
+                self.network._decompress(focus_frame, self.network.compressedFrames[index])
+                yield focus_frame.copy()
+
+    def append(self, graph):
+        # The last frame is always a checkpoint, so it is diffed against directly and the checkpoint
+        # moves to the new frame, unless the old last frame also falls on the checkpoint interval
+        network = self.network
+        last = len(self) - 1
+        if last < 0:
+            network.compressedFrames.append(graph)
+        else:
+            network._addCompressedFrame(network._compressFramePair(network.checkpointFrames[last], graph), False)
+            interval = network.checkpointInterval
+            if last > 0 and not (interval > 0 and last % interval == 0):
+                del network.checkpointFrames[last]
+                network.checkpointIndices.remove(last)
+        network._addCheckpoint(last+1, graph)
+
+class ArchivedFrames(object):
+    """ Read-only sequence of the frames stored in a frame archive (see NetworkFrames.loadFrames).  Each
+    frame is decoded from the archive arrays when it is accessed.
+    """
+    def __init__(self, arrays, header, name):
+        self.arrays = arrays
+        self.header = header
+        self.name = name
+
+    def __len__(self):
+        return len(self.header['directed'])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in xrange(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Invalid index value')
+        directed, graph_data, node, edges = frameArchive.decode_frame(self.arrays, self.header, self.name, index)
+        graph = _buildFrame(directed, node, edges)
+        graph.graph.update(graph_data)
+        return graph
+
+class _ReadOnlyFrame(object):
+    """ Mixin for the zero-copy views handed out by the NetworkFrames accessors.  A view shares the
+    node and edge dictionaries of the stored frame, so reading it costs nothing; the networkx
+    mutators raise a NetworkXError instead of silently altering the stored frame.  Copying a view
+    (graph.copy() or copy.deepcopy) returns an ordinary, mutable networkx graph.
+    """
+    _baseClass = nx.Graph
+    _mutators = ['add_node', 'add_nodes_from', 'remove_node', 'remove_nodes_from', 'add_edge',
+                 'add_edges_from', 'add_weighted_edges_from', 'remove_edge', 'remove_edges_from',
+                 'add_star', 'add_path', 'add_cycle', 'clear']
+
+    def __deepcopy__(self, memo):
+        graph = self._baseClass.__new__(self._baseClass)
+        memo[id(self)] = graph
+        for key, value in self.__dict__.iteritems():
+            if key != 'frozen':
+                graph.__dict__[key] = copy.deepcopy(value, memo)
+        return graph
+
+def _readOnlyMutator(name):
+    def mutator(self, *args, **kwargs):
+        # Graphs built from a view through view.__class__() (subgraph, relabel_nodes, ...) are not
+        # views themselves, so only instances flagged as frozen refuse to change.
+        if self.__dict__.get('frozen', False):
+            raise nx.NetworkXError("Frame views are read-only; copy the frame before modifying it.")
+        return getattr(self._baseClass, name)(self, *args, **kwargs)
+    mutator.__name__ = name
+    return mutator
+
+for _name in _ReadOnlyFrame._mutators:
+    setattr(_ReadOnlyFrame, _name, _readOnlyMutator(_name))
+
+class ReadOnlyGraph(_ReadOnlyFrame, nx.Graph):
+    _baseClass = nx.Graph
+
+class ReadOnlyDiGraph(_ReadOnlyFrame, nx.DiGraph):
+    _baseClass = nx.DiGraph
+
+class ReadOnlyMultiGraph(_ReadOnlyFrame, nx.MultiGraph):
+    _baseClass = nx.MultiGraph
+
+class ReadOnlyMultiDiGraph(_ReadOnlyFrame, nx.MultiDiGraph):
+    _baseClass = nx.MultiDiGraph
+
+_readOnlyClasses = {nx.Graph: ReadOnlyGraph, nx.DiGraph: ReadOnlyDiGraph,
+                    nx.MultiGraph: ReadOnlyMultiGraph, nx.MultiDiGraph: ReadOnlyMultiDiGraph}
+
+def readOnlyView(graph):
+    """ Returns a read-only view of graph that shares its node and edge data.  No data is copied, so
+    the view is only valid as long as graph itself is not modified.
+
+    Parameters
+    ----------
+    graph : networkx graph
+
+    Returns
+    -------
+    A read-only graph of the same type as graph, or a deep copy of graph when its type has no
+    read-only counterpart.
+    """
+    if isinstance(graph, _ReadOnlyFrame):
+        baseClass = graph._baseClass
+    else:
+        baseClass = graph.__class__
+    if baseClass not in _readOnlyClasses:
+        return copy.deepcopy(graph)
+    view = _readOnlyClasses[baseClass].__new__(_readOnlyClasses[baseClass])
+    view.__dict__.update(graph.__dict__)
+    view.frozen = True
+    return view
+
+def _packFrame(graph):
+    """ Serializes a frame for the compression pool.  The node dictionary and the edge list are written
+    with marshal, which is several times faster than pickling the networkx graph; frames holding
+    attribute values marshal cannot write are passed on unchanged and pickled instead.
+    """
+    try:
+        return marshal.dumps((graph.is_directed(), graph.node, list(graph.edges_iter(data=True))))
+    except ValueError:
+        return graph
+
+def _unpackFrame(packedFrame):
+    if not isinstance(packedFrame, str):
+        return packedFrame
+    directed, node, edges = marshal.loads(packedFrame)
+    return _buildFrame(directed, node, edges)
+
+def _buildFrame(directed, node, edges):
+    """ Builds a graph around node, a dict of node attribute dicts, and a list of (start, end, data) edges. """
+    # Fill the graph dictionaries directly, add_nodes_from and add_edges_from would copy every dict again
+    graph = nx.DiGraph() if directed else nx.Graph()
+    graph.node = node
+    adj = dict((n, {}) for n in node)
+    pred = dict((n, {}) for n in node) if directed else adj
+    for start, end, data in edges:
+        adj[start][end] = data
+        pred[end][start] = data
+    if directed:
+        graph.adj = graph.edge = graph.succ = adj
+        graph.pred = pred
+    else:
+        graph.adj = graph.edge = adj
+    return graph
+
+_poolFrames = None  # Frames inherited by forked compression workers
+
+def _compressFrameRun(run):
+    """ Pool worker: compresses each consecutive pair of a run of frames.  The run is either a
+    (start, stop) slice of the frames the worker inherited when it was forked, or a list of packed frames.
+    """
+    if isinstance(run, tuple):
+        frames = _poolFrames[run[0]:run[1]]
+    else:
+        frames = [_unpackFrame(packedFrame) for packedFrame in run]
+    return [_packFrame(NetworkFrames._compressFramePair(frames[index-1], frames[index]))
+            for index in xrange(1, len(frames))]
+
+def _compressFramesInPool(frames, workers):
+    """ Compresses the frame pairs of frames across a pool of worker processes and returns the
+    compressed graphs in frame order.  Each worker handles runs of consecutive frames.  Where the pool
+    is forked the workers read the frames they inherited, so only the (small) compressed frames are
+    serialized; on Windows the frames of each run are packed and shipped to the worker.
+    """
+    global _poolFrames
+    runSize = max(2, -(-(len(frames) - 1) // (workers * 4)) + 1)
+    runs = [(start, min(start + runSize, len(frames))) for start in xrange(0, len(frames) - 1, runSize - 1)]
+    if sys.platform == 'win32':
+        runs = [[_packFrame(frames[index]) for index in xrange(*run)] for run in runs]
+    _poolFrames = frames
+    try:
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(_compressFrameRun, runs)
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        _poolFrames = None
+    return [_unpackFrame(packedFrame) for result in results for packedFrame in result]
+
+def _changedNodes(previous, current):
+    # Nodes whose neighbors differ between two frames, including the nodes that are only in one of them
+    changed = set(previous.node).symmetric_difference(current.node)
+    neighborMaps = [(previous.adj, current.adj)]
+    if current.is_directed():
+        neighborMaps.append((previous.pred, current.pred))
+    for old, new in neighborMaps:
+        for node, neighbors in new.iteritems():
+            if node in old and old[node].viewkeys() != neighbors.viewkeys():
+                changed.add(node)
+    return changed
+
+def _componentsOf(G, nodes):
+    # Weakly connected components of G that hold any of nodes, as lists of nodes
+    components = []
+    seen = set()
+    for start in nodes:
+        if start in seen or start not in G.node:
+            continue
+        seen.add(start)
+        component = [start]
+        for node in component:
+            neighbors = itertools.chain(G.adj[node], G.pred[node]) if G.is_directed() else G.adj[node]
+            for neighbor in neighbors:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    component.append(neighbor)
+        components.append(component)
+    return components
+
+def _pivotCount(size, errorBound, failure=0.1):
+    # Pivots needed for the betweenness estimates of a component of size nodes, normalized by (n-1)(n-2),
+    # to all be within errorBound of the exact values with probability 1-failure (Hoeffding's inequality
+    # over the pivots and a union bound over the nodes)
+    spread = float(size) / max(size - 1, 1)
+    return int(math.ceil(spread**2 * math.log(2. * size / failure) / (2. * errorBound**2)))
+
+def _componentBetweenness(G, component, pivots):
+    # Brandes' accumulation of the shortest path dependencies from the pivots, scaled to the unnormalized
+    # betweenness of the nodes of component.  Using every node of component as a pivot is exact.
+    betweenness = dict.fromkeys(component, 0.0)
+    for source in pivots:
+        stack = []
+        predecessors = {source: []}
+        paths = {source: 1.0}
+        distance = {source: 0}
+        queue = collections.deque([source])
+        while queue:
+            node = queue.popleft()
+            stack.append(node)
+            for neighbor in G.adj[node]:
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    paths[neighbor] = 0.0
+                    predecessors[neighbor] = []
+                    queue.append(neighbor)
+                if distance[neighbor] == distance[node] + 1:
+                    paths[neighbor] += paths[node]
+                    predecessors[neighbor].append(node)
+        dependency = dict.fromkeys(stack, 0.0)
+        while stack:
+            node = stack.pop()
+            for predecessor in predecessors[node]:
+                dependency[predecessor] += paths[predecessor] / paths[node] * (1.0 + dependency[node])
+            if node != source:
+                betweenness[node] += dependency[node]
+    scale = float(len(component)) / len(pivots)
+    if not G.is_directed():
+        scale /= 2.
+    for node in betweenness:
+        betweenness[node] *= scale
+    return betweenness
+
+def _componentCloseness(G, component):
+    # Unnormalized closeness of the nodes of component, as computed by nx.closeness_centrality
+    closeness = {}
+    for node in component:
+        lengths = nx.single_source_shortest_path_length(G, node)
+        total = sum(lengths.itervalues())
+        closeness[node] = (len(lengths) - 1.0) / total if total > 0 and len(G) > 1 else 0.0
+    return closeness
+
+def _frameStatistics(frames, centrality, errorBound):
+    """ Generates the network statistics of each frame of frames, a (graph, statistics) pair where
+    statistics maps each processState value to a dict of the values of the nodes of graph.  The modes of
+    centralityMode other than exact carry the centralities over from one frame to the next, so the dicts
+    are only valid until the next frame is generated.
+    """
+    previous_graph = None
+    cluster_coefficient = {}
+    betweenness_centrality = {}
+    closeness_centrality = {}
+    for processed_graph in frames:
+        if centrality == centralityMode.exact or previous_graph is None:
+            changed = None
+        else:
+            changed = _changedNodes(previous_graph, processed_graph)
+            for node in changed:
+                if node not in processed_graph.node:
+                    cluster_coefficient.pop(node, None)
+                    betweenness_centrality.pop(node, None)
+                    closeness_centrality.pop(node, None)
+        statistics = {processState.degree: processed_graph.degree()}
+        if processed_graph.is_directed():
+            statistics[processState.degreeIn] = processed_graph.in_degree()
+            statistics[processState.degreeOut] = processed_graph.out_degree()
+        else:
+            if changed is None:
+                cluster_coefficient = nx.cluster.clustering(processed_graph)
+            else:
+                # The clustering coefficient of a node only depends on the edges between its neighbors
+                region = set(node for node in changed if node in processed_graph.node)
+                for node in list(region):
+                    region.update(processed_graph.adj[node])
+                cluster_coefficient.update(nx.cluster.clustering(processed_graph, list(region)))
+            statistics[processState.cluster] = cluster_coefficient
+        if centrality == centralityMode.exact:
+            betweenness_centrality = nx.betweenness_centrality(processed_graph, normalized=False)
+            closeness_centrality = nx.closeness.closeness_centrality(processed_graph, normalized=False)
+        else:
+            # Centralities only depend on the component of a node, so the other components keep their values
+            changed_nodes = processed_graph.nodes_iter() if changed is None else changed
+            for component in _componentsOf(processed_graph, changed_nodes):
+                pivots = component
+                if centrality == centralityMode.approximate and _pivotCount(len(component), errorBound) < len(component):
+                    pivots = random.sample(component, _pivotCount(len(component), errorBound))
+                betweenness_centrality.update(_componentBetweenness(processed_graph, component, pivots))
+                closeness_centrality.update(_componentCloseness(processed_graph, component))
+        statistics[processState.closeness] = closeness_centrality
+        statistics[processState.betweenness] = betweenness_centrality
+        yield processed_graph, statistics
+        previous_graph = processed_graph
+
+_poolNetwork = None  # NetworkFrames inherited by forked processing workers
+
+def _processFrameRun(run):
+    """ Pool worker: computes the network statistics of a (start, stop, centrality, errorBound) run of the
+    input frames of the NetworkFrames the worker inherited when it was forked.  The frames are read
+    through read-only views and each one is returned as its node list and a NumPy array per statistic,
+    in node order, rather than as an annotated graph.
+    """
+    start, stop, centrality, errorBound = run
+    frames = (_poolNetwork.getInputNetworkAt(index, False) for index in xrange(start, stop))
+    result = []
+    for graph, statistics in _frameStatistics(frames, centrality, errorBound):
+        nodes = graph.nodes()
+        result.append((nodes, dict((statistic, numpy.array([values[node] for node in nodes]))
+                                   for statistic, values in statistics.iteritems())))
+    return result
+
+class FrameCache(object):
+    """ Bounded least recently used cache for the graphs NetworkFrames rebuilds or derives on demand,
+    keyed by (kind, frame index).  hits and misses count the lookups since the cache was created.
+    """
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """ Returns the graph cached under key, calling build() to create it on a miss. """
+        if key in self.entries:
+            self.hits += 1
+            graph = self.entries.pop(key)
+        else:
+            self.misses += 1
+            graph = build()
+        if self.maxSize > 0:
+            self.entries[key] = graph
+            if len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+        return graph
+
+    def clear(self):
+        self.entries.clear()
+
 class NetworkFrames(object):
-    def __init__(self):
+    def __init__(self, cacheSize=32):
         self.inputFrames = []  # List of graphs that have been added during simulation or read in from graphML
         self.stateName = None  # String name of state used in input graph
         self.processedFrames = []  # List of graphs that the user has added with calculations performed on each frame
         self.compressedFrames = []  # The compressed list of graphs with the initial graph and the subsequent differences
         self.extractionSubgraphs = []  # List of LHS (left hand side) subgraphs that turn into the full compressed frame
+        self.extractionClasses = []  # Index of the first isomorphic extraction subgraph, for each extraction subgraph
+        self.extractionClassesOf = None  # The extractionSubgraphs list that extractionClasses was computed for
         self.decompressedFrames = []  # The uncompressed list of graphs generated from decompressing the compressed frames
+        self.checkpointFrames = {}  # Full snapshots, keyed by frame index, kept when frames are stored as deltas
+        self.checkpointIndices = []  # Sorted keys of checkpointFrames, bisected to find the closest checkpoint
+        self.checkpointInterval = 0  # Frames between the checkpoints, 0 if only the first and last frames are kept
         self.graphML = nx.readwrite.graphml  # The internal networkx graphML object
         self.frameKey = 0  # The frame key used to created unique graph id's for the inputNetwork graphs
         self.compressedFrameKey = 0  # The frame key used to created unique graph id's for the compressed graphs
         self.decompressedFrameKey = 0  # The frame key used to created unique graph id's for the decompressed graphs
         self.processedFrameKey = 0  # The frame key used to create unique graph id's for the processed graphs
         self.extractionSubgraphKey = 0  # The subgraph key used to create unique graph id's for the extraction subgraphs
+        self.frameCache = FrameCache(cacheSize)  # Recently rebuilt and derived frames, cleared whenever the frames change
         self.nodesAddedWhenEdgesData = Display.display(False)
     
     def readGraphML(self, path):
@@ -79,8 +497,142 @@ class NetworkFrames(object):
         None
         """
         self.inputFrames = graphMLRead.read_graphml(path)
+        self.frameCache.clear()
         self._checkForStateName()
-        
+
+    def iterGraphML(self, path):
+        """Lazily reads a graphML file, yielding one networkx graph per frame.  Unlike readGraphML the
+        frames are not stored in self.inputFrames, so peak memory is bounded by a single frame.  The
+        state name is recorded from the first frame that contains nodes.
+
+        Parameters
+        ----------
+        path : string path
+           Path to the graphml file
+
+        Returns
+        -------
+        generator(networkx graph)
+
+        Example
+        -------
+
+        >>>myNetworkFrames = NetworkFrames.NetworkFrames()
+        >>>for frame in myNetworkFrames.iterGraphML('file.graphML'):
+        >>>    print frame.number_of_nodes()
+        """
+        stateChecked = False
+        for frame in graphMLRead.iter_graphml(path):
+            if not stateChecked and frame.number_of_nodes() > 0:
+                node = next(frame.nodes_iter())
+                if len(frame.node[node]) > 0:
+                    # We do not support multiple states at the current time, so we will use the first state that we find.
+                    self.stateName = frame.node[node].keys()[0]
+                stateChecked = True
+            yield frame
+
+    def ingestGraphML(self, path, checkpointInterval=0):
+        """Reads a graphML file and compresses it in a single pass.  Each frame is diffed against the
+        previous one as it is read, so only the current snapshot is held in memory next to the
+        compressed frames.  The first and last frames, and optionally every checkpointInterval-th
+        frame, are kept as full snapshots in self.checkpointFrames.  self.inputFrames is replaced by
+        a CheckpointedFrames sequence that rebuilds the full snapshots on demand.
+
+        Parameters
+        ----------
+        path : string path
+           Path to the graphml file
+
+        checkpointInterval : integer
+           Keep a full snapshot every checkpointInterval frames.  0 (default) only keeps the first
+           and last frames.
+
+        Returns
+        -------
+        None
+
+        Example
+        -------
+
+        >>>myNetworkFrames = NetworkFrames.NetworkFrames()
+        >>>myNetworkFrames.ingestGraphML('file.graphML', checkpointInterval=100)
+        >>>myNetworkFrames.getInputNetworkAt(250)
+        """
+        self._clearCompressedFrameList()
+        self.compressedFrameKey = 0
+        self.checkpointFrames = {}
+        self.checkpointIndices = []
+        self.checkpointInterval = checkpointInterval
+        past_graph = None
+        index = 0
+        for current_graph in self.iterGraphML(path):
+            if past_graph is None:
+                # Add the initial network, i.e., first frame, to the compressed frames list
+                self.compressedFrames.append(current_graph)
+            else:
+                compressed_graph = self._compressFramePair(past_graph, current_graph)
+                compressed_graph.name = str(self.compressedFrameKey)
+                self.compressedFrameKey += 1
+                self.compressedFrames.append(compressed_graph)
+                self._storeExtractionSubgraph(compressed_graph)
+            if index == 0 or (checkpointInterval > 0 and index % checkpointInterval == 0):
+                self._addCheckpoint(index, current_graph)
+            past_graph = current_graph
+            index += 1
+
+        # The current snapshot is the last frame, keep it rather than throwing it away
+        if past_graph is not None:
+            self._addCheckpoint(index-1, past_graph)
+        self.inputFrames = CheckpointedFrames(self)
+
+    def setCheckpointInterval(self, checkpointInterval):
+        """Stores the input frames as full snapshots every checkpointInterval frames and compressed
+        frames in between.  getInputNetworkAt then rebuilds any frame by applying at most
+        checkpointInterval-1 compressed frames to the closest checkpoint, so a smaller interval trades
+        memory for faster access.  The first and last frames are always kept.
+
+        Parameters
+        ----------
+        checkpointInterval : integer
+           Number of frames between full snapshots, must be at least 1.
+
+        Returns
+        -------
+        None
+
+        Example
+        -------
+
+        >>>myNetworkFrames = NetworkFrames.NetworkFrames()
+        >>>myNetworkFrames.readGraphML('file.graphML')
+        >>>myNetworkFrames.setCheckpointInterval(50)
+        >>>myNetworkFrames.getInputNetworkAt(120)
+        """
+        if checkpointInterval < 1:
+            raise ValueError('checkpointInterval must be at least 1')
+        if len(self.inputFrames) < 2:
+            return
+        if not isinstance(self.inputFrames, CheckpointedFrames) and len(self.compressedFrames) != len(self.inputFrames):
+            self.compressNetworkFrames()
+        checkpoints = {}
+        last = len(self.inputFrames) - 1
+        for index, frame in enumerate(self.inputFrames):
+            if index % checkpointInterval == 0 or index == last:
+                checkpoints[index] = frame
+        self.checkpointFrames = {}
+        self.checkpointIndices = []
+        self.checkpointInterval = checkpointInterval
+        for index, frame in checkpoints.iteritems():
+            self._addCheckpoint(index, frame)
+        self.inputFrames = CheckpointedFrames(self)
+        self.frameCache.clear()
+
+    def _addCheckpoint(self, index, graph):
+        # Records a full snapshot of the input frame at index
+        if index not in self.checkpointFrames:
+            bisect.insort(self.checkpointIndices, index)
+        self.checkpointFrames[index] = graph
+
     def _checkForStateName(self):
         """Checks the nodes in the network to see if there is a state value used in the network and records it's name
         
@@ -129,7 +681,157 @@ class NetworkFrames(object):
         void
         """
         self.compressedFrames = graphMLRead.read_graphml(path)
+        self.extractionSubgraphs = []
+        self.frameCache.clear()
+        self.generateExtractionSubgraphs()
         
+    def saveFrames(self, path, mapped=False):
+        """Writes the input and compressed frames to a compact binary archive, which loadFrames reads back
+        far faster than the frames can be parsed from graphML.
+
+        Parameters
+        ----------
+        path : string path
+           The file path and/or file name of the archive
+
+        mapped : boolean
+           If False (default) the archive is a single NumPy .npz file that loadFrames reads into memory.
+           If True path is a directory of raw array files that loadFrames memory-maps, for datasets
+           that do not fit in memory.
+
+        Returns
+        -------
+        void
+
+        Example
+        -------
+
+        >>>myNetworkFrames = NetworkFrames.NetworkFrames()
+        >>>myNetworkFrames.readGraphML('file.graphML')
+        >>>myNetworkFrames.compressNetworkFrames()
+        >>>myNetworkFrames.saveFrames('file.npz')
+        """
+        self.generateExtractionSubgraphs()
+        frameArchive.write_archive(path, [('input', self.inputFrames), ('compressed', self.compressedFrames),
+                                          ('extraction', self.extractionSubgraphs)],
+                                   self.stateName, mapped, {'extractionClasses': self.getExtractionClasses()})
+
+    def loadFrames(self, path):
+        """Reads an archive written by saveFrames or convertGraphML.  Only the archive arrays are read,
+        or memory-mapped for a mapped archive; the frames in self.inputFrames and self.compressedFrames
+        are decoded from them when they are accessed.  Adding a frame (addGraph or compression) first
+        decodes the archived frames into ordinary lists.
+
+        Parameters
+        ----------
+        path : string path
+           Path to the archive
+
+        Returns
+        -------
+        void
+
+        Example
+        -------
+
+        >>>myNetworkFrames = NetworkFrames.NetworkFrames()
+        >>>myNetworkFrames.loadFrames('file.npz')
+        >>>myNetworkFrames.getInputNetworkAt(120)
+        """
+        arrays, header = frameArchive.read_archive(path)
+        frameSets = header['sets']
+        self.inputFrames = ArchivedFrames(arrays, frameSets['input'], 'input') if len(frameSets['input']['directed']) > 0 else []
+        self.compressedFrames = ArchivedFrames(arrays, frameSets['compressed'], 'compressed') if len(frameSets['compressed']['directed']) > 0 else []
+        # The first compressed frame is the initial network, not a keyed change frame
+        self.compressedFrameKey = max(len(self.compressedFrames) - 1, 0)
+        # Archives written before the extraction subgraphs were stored leave them to generateExtractionSubgraphs
+        self.extractionSubgraphs = []
+        if 'extraction' in frameSets and len(frameSets['extraction']['directed']) > 0:
+            self.extractionSubgraphs = ArchivedFrames(arrays, frameSets['extraction'], 'extraction')
+        self.extractionSubgraphKey = len(self.extractionSubgraphs)
+        self.extractionClasses = header['metadata'].get('extractionClasses', [])
+        self.extractionClassesOf = self.extractionSubgraphs
+        self.stateName = header['stateName']
+        self.checkpointFrames = {}
+        self.checkpointIndices = []
+        self.checkpointInterval = 0
+        self.frameCache.clear()
+
+    def _unarchiveFrames(self):
+        # Replaces the frame lists read from an archive by ordinary lists before they are modified
+        if isinstance(self.inputFrames, ArchivedFrames):
+            self.inputFrames = list(self.inputFrames)
+        if isinstance(self.compressedFrames, ArchivedFrames):
+            self.compressedFrames = list(self.compressedFrames)
+        if isinstance(self.extractionSubgraphs, ArchivedFrames):
+            archived = self.extractionSubgraphs
+            self.extractionSubgraphs = list(archived)
+            if self.extractionClassesOf is archived:
+                self.extractionClassesOf = self.extractionSubgraphs
+
+    def convertGraphML(self, path, archivePath, mapped=False):
+        """Converts a graphML file to a binary archive and loads the archive.  The frames are read,
+        compressed and written one at a time, so the graphML file never has to fit in memory.
+
+        Parameters
+        ----------
+        path : string path
+           Path to the graphml file
+
+        archivePath : string path
+           The file path and/or file name of the archive
+
+        mapped : boolean
+           Write a memory-mapped archive directory instead of a .npz file (see saveFrames).
+
+        Returns
+        -------
+        void
+
+        Example
+        -------
+
+        >>>myNetworkFrames = NetworkFrames.NetworkFrames()
+        >>>myNetworkFrames.convertGraphML('file.graphML', 'file.frames', mapped=True)
+        >>>myNetworkFrames.getInputNetworkAt(120)
+        """
+        frames = self.iterGraphML(path)
+        # Read up to the first frame with nodes, so the state name is known before the archive is written
+        leading = []
+        for frame in frames:
+            leading.append(frame)
+            if frame.number_of_nodes() > 0:
+                break
+        inputFrames, pastFrames = itertools.tee(itertools.chain(leading, frames))
+        compressedFrames, deltaFrames = itertools.tee(self._iterCompressedFrames(pastFrames))
+        frameArchive.write_archive(archivePath, [('input', inputFrames), ('compressed', compressedFrames),
+                                                 ('extraction', self._iterExtractionSubgraphs(deltaFrames))],
+                                   self.stateName, mapped)
+        self.loadFrames(archivePath)
+
+    def _iterCompressedFrames(self, frames):
+        # Yields the compressed frames of a stream of input frames, named as compressNetworkFrames names them
+        past_graph = None
+        key = 0
+        for current_graph in frames:
+            if past_graph is None:
+                yield current_graph
+            else:
+                compressed_graph = self._compressFramePair(past_graph, current_graph)
+                compressed_graph.name = str(key)
+                key += 1
+                yield compressed_graph
+            past_graph = current_graph
+
+    def _iterExtractionSubgraphs(self, compressedFrames):
+        # Yields the extraction subgraphs of a stream of compressed frames, skipping the initial frame
+        key = 0
+        for deltaGraph in itertools.islice(compressedFrames, 1, None):
+            extractionSubgraph = self._extractionSubgraphFromDelta(deltaGraph)
+            extractionSubgraph.name = str(key)
+            key += 1
+            yield extractionSubgraph
+
     def addGraph(self, graph):
         """Adds a networkx graph to an internal list giving each graph a unique numeric name.
 
@@ -155,10 +857,12 @@ class NetworkFrames(object):
         if len(self.inputFrames) is 0:
             self.frameKey = 0
         
+        self._unarchiveFrames()
         new_graph = graph.copy()
         new_graph.name = str(self.frameKey)
         self.frameKey += 1
         self.inputFrames.append(new_graph)
+        self.frameCache.clear()
     
     def setInputNetwork(self, input_network):
         """Sets the input networkx graph list to the one passed in
@@ -182,30 +886,37 @@ class NetworkFrames(object):
                 >>>myNetworkFrames.setInputNetwork(graphList)
                 """
         self.inputFrames = copy.deepcopy(input_network)
+        self.frameCache.clear()
         self._checkForStateName()
         
     def _setCompressedFrames(self, compressed_frames):
         # Sets the compressed frames list to the list passed in
         self.compressedFrames = copy.deepcopy(compressed_frames)
+        self.extractionSubgraphs = []
+        self.frameCache.clear()
+        self.generateExtractionSubgraphs()
         
-    def _addProcessedFrame(self, graph):
+    def _addProcessedFrame(self, graph, copyGraph=True):
         # Reset the graph key if the processedFrames' length is 0
         if len(self.processedFrames) is 0:
             self.processedFrameKey = 0
-        new_graph = graph.copy()
+        new_graph = graph.copy() if copyGraph else graph
         new_graph.name = str(self.processedFrameKey)
         self.processedFrameKey += 1
         self.processedFrames.append(new_graph)
         
-    def _addCompressedFrame(self, graph):
+    def _addCompressedFrame(self, graph, copyGraph=True):
+        self._unarchiveFrames()
         #Reset the graphKey if the compressedFrames' length is 0
         if len(self.compressedFrames) is 0:
             self.compressedFrameKey = 0
         
-        new_graph = graph.copy()
+        new_graph = graph.copy() if copyGraph else graph
         new_graph.name = str(self.compressedFrameKey)
         self.compressedFrameKey += 1
         self.compressedFrames.append(new_graph)
+        self._storeExtractionSubgraph(new_graph)
+        self.frameCache.clear()
         
     def _addDecompressedFrame(self, graph):
 
@@ -219,6 +930,7 @@ class NetworkFrames(object):
         self.decompressedFrames.append(new_graph)
         
     def _addExtractionSubgraph(self, graph):
+        self._unarchiveFrames()
         #Reset the graphKey if the compressedFrames's length is 0
         if len(self.extractionSubgraphs) is 0:
             self.extractionSubgraphKey = 0
@@ -227,9 +939,37 @@ class NetworkFrames(object):
         new_graph.name = str(self.extractionSubgraphKey)
         self.extractionSubgraphKey += 1
         self.extractionSubgraphs.append(new_graph)
+
+    def _storeExtractionSubgraph(self, deltaGraph):
+        # Computes the extraction subgraph of a compressed frame and appends it without copying
+        self._unarchiveFrames()
+        if len(self.extractionSubgraphs) is 0:
+            self.extractionSubgraphKey = 0
+        extractionSubgraph = self._extractionSubgraphFromDelta(deltaGraph)
+        extractionSubgraph.name = str(self.extractionSubgraphKey)
+        self.extractionSubgraphKey += 1
+        self.extractionSubgraphs.append(extractionSubgraph)
+
+    def generateExtractionSubgraphs(self):
+        """Computes the extraction subgraphs of the compressed frames that do not have one yet.  Compression
+        already stores the extraction subgraph of every frame it produces, so this only has work to do when
+        the compressed frames were set some other way.
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for index in xrange(len(self.extractionSubgraphs) + 1, len(self.compressedFrames)):
+            self._storeExtractionSubgraph(self._getCompressedNetworkAt(index, False))
         
     def _clearCompressedFrameList(self):
         self.compressedFrames = []
+        self.extractionSubgraphs = []
+        self.frameCache.clear()
         
     def _clearProcessedFrameList(self):
         self.processedFrames = []
@@ -418,6 +1158,43 @@ class NetworkFrames(object):
         """
         return self.extractionSubgraphs
     
+    def getExtractionClasses(self):
+        """ Gets the isomorphism class of each extraction subgraph, as the index of the first extraction
+        subgraph that is isomorphic to it (comparing node data, as Utility.isIsomorphic does).  The
+        subgraphs are bucketed by Utility.isomorphismInvariant, so each one is only compared with the
+        classes in its bucket.  Classes are only computed for the subgraphs that do not have one yet, and
+        saveFrames stores them in the archive.
+        
+        Returns
+        -------
+        extractionClasses : list (int)
+          - The class of each extraction subgraph, in the order of the extraction subgraphs
+        
+        """
+        self.generateExtractionSubgraphs()
+        if self.extractionClassesOf is not self.extractionSubgraphs or \
+           len(self.extractionClasses) > len(self.extractionSubgraphs):
+            self.extractionClasses = []
+            self.extractionClassesOf = self.extractionSubgraphs
+        if len(self.extractionClasses) < len(self.extractionSubgraphs):
+            util = Utility.utility()
+            buckets = {}
+            for index, representative in enumerate(self.extractionClasses):
+                if index == representative:
+                    buckets.setdefault(util.isomorphismInvariant(self._getExtractionSubgraphAt(index, False)), []).append(index)
+            for index in xrange(len(self.extractionClasses), len(self.extractionSubgraphs)):
+                subgraph = self._getExtractionSubgraphAt(index, False)
+                bucket = buckets.setdefault(util.isomorphismInvariant(subgraph), [])
+                representative = index
+                for candidate in bucket:
+                    if util.isIsomorphic(self._getExtractionSubgraphAt(candidate, False), subgraph):
+                        representative = candidate
+                        break
+                if representative == index:
+                    bucket.append(index)
+                self.extractionClasses.append(representative)
+        return self.extractionClasses
+    
     def clearInputNetworks(self):
         """Clears the inputNetowork list of networkx graphs in the NetworkFrames object.
 
@@ -430,6 +1207,7 @@ class NetworkFrames(object):
         void
         """
         self.inputFrames = []
+        self.frameCache.clear()
         
     def getInputNetworkAt(self, index, deepcopy=True):
         """ Gets an input network frame at the index value passed in.
@@ -438,17 +1216,17 @@ class NetworkFrames(object):
         ----------
         index : integer index
         
+        deepcopy : boolean
+           If True (default) a deep copy of the frame is returned.  If False a read-only view that shares
+           the data of the frame in the inputFrame list is returned; copy the view before modifying it.
+        
         Returns
         ----------
-        The network frame at the index passed into the method.  The frame returned is a deep copy of the 
-        frame in the inputFrame list.
+        The network frame at the index passed into the method.
         
         """
         if 0 <= index < len(self.inputFrames):
-            if deepcopy:
-                return copy.deepcopy(self.inputFrames[index])
-            else:
-                return self.inputFrames[index]
+            return self._frameAt(self.inputFrames, index, deepcopy, 'input')
         else:
             raise KeyError('Invalid index value')
         
@@ -459,20 +1237,44 @@ class NetworkFrames(object):
         ----------
         index : integer index
         
+        deepcopy : boolean
+           If True (default) a deep copy of the frame is returned.  If False a read-only view that shares
+           the data of the frame in the compressedFrame list is returned; copy the view before modifying it.
+        
         Returns
         ----------
-        The network frame at the index passed into the method.  The frame returned is a deep copy of the 
-        frame in the compressedFrame list.
+        The network frame at the index passed into the method.
         
         """
         if 0 <= index < len(self.compressedFrames):
-            if deepcopy:
-                return copy.deepcopy(self.compressedFrames[index])
-            else:
-                return self.compressedFrames[index]
+            return self._frameAt(self.compressedFrames, index, deepcopy, 'compressed')
         else:
             raise KeyError('Invalid index value')
      
+    def _frameAt(self, frames, index, deepcopy, kind=None):
+        if isinstance(frames, (CheckpointedFrames, ArchivedFrames)):
+            # These frames are rebuilt on every access, so keep the recently used ones
+            frame = self.frameCache.get((kind, index), lambda: frames[index])
+        else:
+            frame = frames[index]
+        if deepcopy:
+            return copy.deepcopy(frame)
+        else:
+            return readOnlyView(frame)
+     
+    def getCacheStatistics(self):
+        """ Gets the usage of the cache for rebuilt and derived frames.
+        
+        Returns
+        ----------
+        statistics : dict
+           'hits' and 'misses' count the cache lookups, 'size' is the number of cached graphs and
+           'maxSize' the capacity of the cache.
+        
+        """
+        return {'hits': self.frameCache.hits, 'misses': self.frameCache.misses,
+                'size': len(self.frameCache.entries), 'maxSize': self.frameCache.maxSize}
+     
     def getNumberOfChanges(self, index):
         network = self._getCompressedNetworkAt(index, False)
         changes = 0
@@ -492,61 +1294,92 @@ class NetworkFrames(object):
          
         return changes
     
-    def _getDecompressedNetworkAt(self, index):
+    def _getDecompressedNetworkAt(self, index, deepcopy=True):
         """ Gets a decompressed network frame at the index value passed in.
         
         Parameters
         ----------
         index : integer index
         
+        deepcopy : boolean
+           If True (default) a deep copy of the frame is returned.  If False a read-only view that shares
+           the data of the frame in the decompressedFrame list is returned; copy the view before modifying it.
+        
         Returns
         ----------
-        The network frame at the index passed into the method.  The frame returned is a deep copy of the 
-        frame in the decompressedFrame list.
+        The network frame at the index passed into the method.
         
         """
         if 0 <= index < len(self.decompressedFrames):
-            return copy.deepcopy(self.decompressedFrames[index])
+            return self._frameAt(self.decompressedFrames, index, deepcopy)
         else:
             raise KeyError('Invalid index value')
 
-    def _getProcessedNetworkAt(self, index):
+    def _getProcessedNetworkAt(self, index, deepcopy=True):
         """ Gets a processed network frame at the index value passed in.
         
         Parameters
         ----------
         index : integer index
         
+        deepcopy : boolean
+           If True (default) a deep copy of the frame is returned.  If False a read-only view that shares
+           the data of the frame in the processedFrames list is returned; copy the view before modifying it.
+        
         Returns
         ----------
-        The network frame at the index passed into the method.  The frame returned is a deep copy of the 
-        frame in the processedFrames list.
+        The network frame at the index passed into the method.
         
         """
         if 0 <= index < len(self.processedFrames):
-            return copy.deepcopy(self.processedFrames[index])
+            return self._frameAt(self.processedFrames, index, deepcopy)
         else:
             raise KeyError('Invalid index value')
         
-    def _getExtractionSubgraphAt(self, index):
+    def _getExtractionSubgraphAt(self, index, deepcopy=True):
         """ Gets an extraction subgraph at the index value passed in.
         
         Parameters
         ----------
         index : integer index
         
+        deepcopy : boolean
+           If True (default) a deep copy of the frame is returned.  If False a read-only view that shares
+           the data of the frame in the extractionSubgraphs list is returned; copy the view before modifying it.
+        
         Returns
         ----------
-        The network frame at the index passed into the method.  The subgraph returned is a deep copy of the 
-        subgraph in the extractionSubgraphs list.
+        The network frame at the index passed into the method.
         
         """
         if 0 <= index < len(self.extractionSubgraphs):
-            return copy.deepcopy(self.extractionSubgraphs[index])
+            return self._frameAt(self.extractionSubgraphs, index, deepcopy, 'extraction')
+        else:
+            raise KeyError('Invalid index value')
+
+    def getExtractionSubgraphOfFrame(self, index):
+        """ Gets the extraction subgraph of the compressed frame at index, i.e. the part of input frame index-1
+        that was rewritten to produce input frame index.  The subgraph is computed once, when the frame is
+        compressed, and a read-only view of it is returned without copying.
+        
+        Parameters
+        ----------
+        index : integer index
+           Index of the compressed frame, at least 1
+        
+        Returns
+        ----------
+        A read-only view of the extraction subgraph; copy it before modifying it.
+        
+        """
+        if 0 < index < len(self.compressedFrames):
+            if index > len(self.extractionSubgraphs):
+                self.generateExtractionSubgraphs()
+            return self._getExtractionSubgraphAt(index - 1, False)
         else:
             raise KeyError('Invalid index value')
         
-    def compressNetworkFrames(self, processed=False):
+    def compressNetworkFrames(self, processed=False, workers=None):
         """ Compresses the inputFrames into a list of NetworkX graph objects such that each new frame only
         includes the changes from the previous frame.  This is used prepare the data for input into a GNA
         instance.
@@ -561,6 +1394,10 @@ class NetworkFrames(object):
         processed : boolean
          - The parameter controls the source of the compression.  Default is the processed data.
         
+        workers : integer
+         - Number of worker processes used to compress the frame pairs.  None (default) or 1 compresses
+           serially in this process.
+        
         Returns
         ----------
         None
@@ -572,123 +1409,177 @@ class NetworkFrames(object):
             loop_network = self.processedFrames
         else:
             loop_network = self.inputFrames
+            # Frames ingested with ingestGraphML are already compressed, and are rebuilt from compressedFrames
+            if isinstance(loop_network, CheckpointedFrames):
+                return
             
         # If we have at least two network frames
         if len(loop_network) > 1:
             self._clearCompressedFrameList()
             # Add the initial network, i.e., first frame, to the compressed frames list
             self.compressedFrames.append(loop_network[0])
+            if workers is not None and workers > 1:
+                for compressed_graph in _compressFramesInPool(loop_network, workers):
+                    self._addCompressedFrame(compressed_graph)
+                return
             past_frame = 0
             current_frame = 1
             # Loop over all frames
             while current_frame < len(loop_network):
                 past_graph = loop_network[past_frame]
                 current_graph = loop_network[current_frame]
-                compressed_graph = nx.DiGraph() if past_graph.is_directed() else nx.Graph()
-                # Check nodes for state changes and for additions
-                for checkNode in current_graph.nodes_iter():
-                    # If checkNode is in past graph check for state changes
-                    if checkNode in past_graph.node:
-                        # Loop over all states
-                        state_same = True
-                        state_name = ''
-                        for states in current_graph.node[checkNode]:
-                            # If node has a different state set
-                            if states not in processState.allStates:
-                                if not current_graph.node[checkNode][states] == past_graph.node[checkNode][states]:
-                                    state_name = states
-                                    state_same = False
-                        if not state_same:
-                            add_node = copy.deepcopy(current_graph.node[checkNode])
-                            add_node[compressState.tag] = compressState.stateChange
-                            add_node[compressState.stateChangedFrom] = past_graph.node[checkNode][state_name]
-                            add_node[compressState.stateChangedTo] = current_graph.node[checkNode][state_name]
-                            add_node[compressState.stateChangedName] = state_name
-                            compressed_graph.add_node(checkNode, add_node)
-                    # If node doesn't exist in pastGraph a new node was added to currentGraph
-                    else:
-                        add_node = copy.deepcopy(current_graph.node[checkNode])
-                        add_node[compressState.tag] = compressState.added
-                        compressed_graph.add_node(checkNode, add_node)
-                # Check nodes for deletions
-                for checkNode in past_graph.nodes_iter():
-                    # If node doesn't exist in the current graph, it was deleted
-                    if checkNode not in current_graph.node:
-                        add_node = copy.deepcopy(past_graph.node[checkNode])
-                        add_node[compressState.tag] = compressState.deleted
-                        compressed_graph.add_node(checkNode, add_node)
-                 
-                # Check edges for additions
-                for checkEdge in current_graph.edges_iter():
-                    start = checkEdge[0]
-                    end = checkEdge[1]
-                    if start not in past_graph.edge or end not in past_graph.edge[start]:
-                        # If the nodes don't exist add them to the compressed graph
-                        if start not in compressed_graph.node:
-                            add_node = copy.deepcopy(current_graph.node[start])
-                            add_node[compressState.tag] = compressState.none
-                            compressed_graph.add_node(start, add_node)
-                        if end not in compressed_graph.node:
-                            add_node = copy.deepcopy(current_graph.node[end])
-                            add_node[compressState.tag] = compressState.none
-                            compressed_graph.add_node(end, add_node)
-                        edge_data = copy.deepcopy(current_graph.edge[start][end])
-                        edge_data[compressState.tag] = compressState.added
-                        # Add the edge to the compressed graph
-                        compressed_graph.add_edge(start, end, edge_data)
-                    #Check for state change
-                    elif start in past_graph.edge and end in past_graph.edge[start] and \
-                         start in current_graph.edge and end in current_graph[start]:
-                        for states in past_graph[start][end]:
-                            if states in current_graph[start][end] and current_graph[start][end][states] != past_graph[start][end][states]:
-                                add_edge = copy.deepcopy(past_graph.edge[start][end])
-                                add_edge[compressState.tag] = compressState.stateChange
-                                add_edge[compressState.stateChangedFrom] = past_graph.edge[start][end][states]
-                                add_edge[compressState.stateChangedTo] = current_graph.edge[start][end][states]
-                                add_edge[compressState.stateChangedName] = states
-                                compressed_graph.add_edge(start, end, add_edge)
-                                if compressed_graph.node[start] == {}:
-                                    compressed_graph.node[start][compressState.tag] = compressState.none
-                                if compressed_graph.node[end] == {}:
-                                    compressed_graph.node[end][compressState.tag] = compressState.none
-                        
-                # Check edges for deletions
-                for checkEdge in past_graph.edges_iter():
-                    start = checkEdge[0]
-                    end = checkEdge[1]
-                    if start not in current_graph.edge or end not in current_graph.edge[start]:
-                        # If the nodes don't exist add them to the compressed graph
-                        if start not in compressed_graph.node:
-                            add_node = copy.deepcopy(past_graph.node[start])
-                            add_node[compressState.tag] = compressState.none
-                            compressed_graph.add_node(start, add_node)
-                        if end not in compressed_graph.node:
-                            add_node = copy.deepcopy(past_graph.node[end])
-                            add_node[compressState.tag] = compressState.none
-                            compressed_graph.add_node(end, add_node)
-                        # Add the edge to the compressed graph
-                        edge_data = copy.deepcopy(past_graph.edge[start][end])
-                        edge_data[compressState.tag] = compressState.deleted
-                        compressed_graph.add_edge(start, end, edge_data)
-                        
-                # Check to see if there are unchanging edges.
-                '''for checkEdge in pastGraph.edges_iter():
-                    start = checkEdge[0]
-                    end = checkEdge[1]
-                    if (start in currentGraph.edge and end in currentGraph.edge[start]) and \
-                       (start not in compressedGraph.edge or end not in compressedGraph.edge[start]) and \
-                       start in compressedGraph.node and \
-                       end in compressedGraph.node:
-                        edgedata = copy.deepcopy(pastGraph.edge[start][end])
-                        edgedata[compressState.tag] = compressState.none
-                        compressedGraph.add_edge(start, end, edgedata)'''
-                        
+                compressed_graph = self._compressFramePair(past_graph, current_graph)
                 # Add the compressed graph to the internal list
                 self._addCompressedFrame(compressed_graph)
                 past_frame += 1
                 current_frame += 1
                 
     
+    @staticmethod
+    def _extractionSubgraphFromDelta(deltaGraph):
+        # Rebuilds the part of the previous frame that the changes in deltaGraph rewrote: the deleted and
+        # unchanged nodes and edges, with changed states set back to their previous values.  deltaGraph is
+        # only read, the attribute dicts of the subgraph are new.
+        extractionSubgraph = nx.DiGraph() if deltaGraph.is_directed() else nx.Graph()
+        changeKeys = (compressState.tag, compressState.stateChangedName,
+                      compressState.stateChangedFrom, compressState.stateChangedTo)
+        for node, data in deltaGraph.node.iteritems():
+            state = data[compressState.tag]
+            # We are only interested in nodes that were deleted, unchanged or changed state
+            if state == compressState.deleted or state == compressState.none:
+                attributes = dict(data)
+                del attributes[compressState.tag]
+            elif state == compressState.stateChange:
+                attributes = dict((key, value) for key, value in data.iteritems() if key not in changeKeys)
+                attributes[data[compressState.stateChangedName]] = data[compressState.stateChangedFrom]
+            else:
+                continue
+            extractionSubgraph.add_node(node, attributes)
+
+        for start, end, data in deltaGraph.edges_iter(data=True):
+            change = data[compressState.tag]
+            if change == compressState.deleted or change == compressState.none:
+                attributes = dict(data)
+                del attributes[compressState.tag]
+            elif change == compressState.stateChange:
+                attributes = dict((key, value) for key, value in data.iteritems() if key not in changeKeys)
+                attributes[data[compressState.stateChangedName]] = data[compressState.stateChangedFrom]
+            else:
+                continue
+            extractionSubgraph.add_edge(start, end, attributes)
+        return extractionSubgraph
+
+    @staticmethod
+    def _compressFramePair(past_graph, current_graph):
+        """ Builds the compressed graph holding the changes between two consecutive frames, past_graph (t-1)
+        and current_graph (t).  See compressNetworkFrames for the current assumptions.
+        
+        Added and deleted nodes and edges are found with set operations on the node and adjacency
+        dictionaries.  Nodes and edges present in both frames are first compared as whole attribute
+        dictionaries, so the individual states are only inspected for the few that actually changed.
+        """
+        compressed_graph = nx.DiGraph() if past_graph.is_directed() else nx.Graph()
+        directed = past_graph.is_directed()
+        current_node = current_graph.node
+        past_node = past_graph.node
+        current_adj = current_graph.adj
+        past_adj = past_graph.adj
+        
+        # Check nodes for state changes
+        for checkNode in [node for node in current_node.viewkeys() & past_node.viewkeys() if current_node[node] != past_node[node]]:
+            state_same = True
+            state_name = ''
+            for states in current_node[checkNode]:
+                # If node has a different state set
+                if states not in processState.allStates:
+                    if not current_node[checkNode][states] == past_node[checkNode][states]:
+                        state_name = states
+                        state_same = False
+            if not state_same:
+                add_node = dict(current_node[checkNode])
+                add_node[compressState.tag] = compressState.stateChange
+                add_node[compressState.stateChangedFrom] = past_node[checkNode][state_name]
+                add_node[compressState.stateChangedTo] = current_node[checkNode][state_name]
+                add_node[compressState.stateChangedName] = state_name
+                compressed_graph.add_node(checkNode, add_node)
+        # If node doesn't exist in past_graph a new node was added to current_graph
+        for checkNode in current_node.viewkeys() - past_node.viewkeys():
+            add_node = dict(current_node[checkNode])
+            add_node[compressState.tag] = compressState.added
+            compressed_graph.add_node(checkNode, add_node)
+        # If node doesn't exist in the current graph, it was deleted
+        for checkNode in past_node.viewkeys() - current_node.viewkeys():
+            add_node = dict(past_node[checkNode])
+            add_node[compressState.tag] = compressState.deleted
+            compressed_graph.add_node(checkNode, add_node)
+        
+        # Only the adjacencies that differ between the frames can hold edge changes
+        changed_adj = [node for node in current_adj if current_adj[node] != past_adj.get(node)]
+        changed_adj.extend(past_adj.viewkeys() - current_adj.viewkeys())
+        
+        # Check edges for additions and state changes
+        for start in changed_adj:
+            neighbours = current_adj.get(start, {})
+            past_neighbours = past_adj.get(start, {})
+            for end in neighbours.viewkeys() - past_neighbours.viewkeys():
+                # Undirected edges are seen from both of their nodes
+                if not directed and start in compressed_graph.adj.get(end, {}):
+                    continue
+                # If the nodes don't exist add them to the compressed graph
+                for node in (start, end):
+                    if node not in compressed_graph.node:
+                        add_node = dict(current_node[node])
+                        add_node[compressState.tag] = compressState.none
+                        compressed_graph.add_node(node, add_node)
+                edge_data = dict(neighbours[end])
+                edge_data[compressState.tag] = compressState.added
+                compressed_graph.add_edge(start, end, edge_data)
+            for end in [node for node in neighbours.viewkeys() & past_neighbours.viewkeys() if neighbours[node] != past_neighbours[node]]:
+                for states in past_neighbours[end]:
+                    if states in neighbours[end] and neighbours[end][states] != past_neighbours[end][states]:
+                        add_edge = dict(past_neighbours[end])
+                        add_edge[compressState.tag] = compressState.stateChange
+                        add_edge[compressState.stateChangedFrom] = past_neighbours[end][states]
+                        add_edge[compressState.stateChangedTo] = neighbours[end][states]
+                        add_edge[compressState.stateChangedName] = states
+                        compressed_graph.add_edge(start, end, add_edge)
+                        if compressed_graph.node[start] == {}:
+                            compressed_graph.node[start][compressState.tag] = compressState.none
+                        if compressed_graph.node[end] == {}:
+                            compressed_graph.node[end][compressState.tag] = compressState.none
+        
+        # Check edges for deletions
+        for start in changed_adj:
+            neighbours = current_adj.get(start, {})
+            past_neighbours = past_adj.get(start, {})
+            for end in past_neighbours.viewkeys() - neighbours.viewkeys():
+                if not directed and start in compressed_graph.adj.get(end, {}):
+                    continue
+                # If the nodes don't exist add them to the compressed graph
+                for node in (start, end):
+                    if node not in compressed_graph.node:
+                        add_node = dict(past_node[node])
+                        add_node[compressState.tag] = compressState.none
+                        compressed_graph.add_node(node, add_node)
+                # Add the edge to the compressed graph
+                edge_data = dict(past_neighbours[end])
+                edge_data[compressState.tag] = compressState.deleted
+                compressed_graph.add_edge(start, end, edge_data)
+                
+        # Check to see if there are unchanging edges.
+        '''for checkEdge in pastGraph.edges_iter():
+            start = checkEdge[0]
+            end = checkEdge[1]
+            if (start in currentGraph.edge and end in currentGraph.edge[start]) and \
+               (start not in compressedGraph.edge or end not in compressedGraph.edge[start]) and \
+               start in compressedGraph.node and \
+               end in compressedGraph.node:
+                edgedata = copy.deepcopy(pastGraph.edge[start][end])
+                edgedata[compressState.tag] = compressState.none
+                compressedGraph.add_edge(start, end, edgedata)'''
+        
+        return compressed_graph
+
     def decrompressNetworkFrames(self):
         """ Decompresses the compressed frames back into the original format of a list of networkX graphs
         
@@ -697,12 +1588,12 @@ class NetworkFrames(object):
             # Clear the decompressed frame list
             self.decompressedFrames = []
             # Add the first frame to the decompressed list
-            self._addDecompressedFrame(self._getCompressedNetworkAt(0))
+            self._addDecompressedFrame(self._getCompressedNetworkAt(0, False))
             focus_frame = self._getDecompressedNetworkAt(0)
             frame_index = 1
             while frame_index < len(self.compressedFrames):
                 # Get the compressed frame at the frameIndex
-                change_frame = self._getCompressedNetworkAt(frame_index)
+                change_frame = self._getCompressedNetworkAt(frame_index, False)
                 
                 # Decompress this changeFrame
                 self._decompress(focus_frame, change_frame)
@@ -711,49 +1602,75 @@ class NetworkFrames(object):
                 self._addDecompressedFrame(focus_frame)
                 frame_index += 1
         
+    def _reconstructInputFrame(self, index):
+        """ Rebuilds the full input frame at index by applying the compressed frames that follow the
+        closest checkpoint at or before index.
+        """
+        checkpoint = self.checkpointIndices[bisect.bisect_right(self.checkpointIndices, index)-1]
+        focus_frame = self.checkpointFrames[checkpoint].copy()
+        for frame_index in xrange(checkpoint+1, index+1):
+            self._decompress(focus_frame, self.compressedFrames[frame_index])
+        return focus_frame
+        
     def _decompress(self, focus_frame, change_frame):
         """ Decompression function that takes the compressed graph: changeFrame, and "unpacks" it
-        into the focusFrame.
+        into the focusFrame.  The change frame is left untouched, so stored compressed frames and
+        read-only views can be passed in directly.
+        
+        Added nodes whose id is already used in the focus frame get the next free id above the
+        largest id in the focus frame.  The renaming is recorded in a map that is applied to the
+        edges of the change frame, so the cost is proportional to the size of the change frame.
         """
+        Features.markChanged(focus_frame)
+        update_map = {}
+        max_node = None  # Largest node id in focus_frame, only computed once an id collides
         # Loop over the nodes in the compressed frame
-        for nodes in change_frame.nodes_iter():
-            change = change_frame.node[nodes].pop(compressState.tag)
+        for nodes, node_data in change_frame.node.iteritems():
+            change = node_data[compressState.tag]
             # If the change state is 'Added', add node
             if change == compressState.added:
                 add_node = nodes
-                if nodes in focus_frame.nodes_iter():
-                    add_node = max(focus_frame.nodes())+1
+                if nodes in focus_frame.node:
+                    if max_node is None:
+                        max_node = max(focus_frame.node)
+                    add_node = max_node+1
                     while add_node in change_frame.node:
                         add_node += 1
-                    update_map = {nodes: add_node}
-                    focus_frame.add_node(add_node, change_frame.node[nodes])
-                    change_frame = nx.relabel_nodes(change_frame, update_map)
-                else:
-                    focus_frame.add_node(add_node, change_frame.node[nodes])
+                    update_map[nodes] = add_node
+                if max_node is not None and add_node > max_node:
+                    max_node = add_node
+                add_data = dict(node_data)
+                del add_data[compressState.tag]
+                focus_frame.add_node(add_node, add_data)
             # If the change state is 'Deleted', delete node
             elif change == compressState.deleted:
                 focus_frame.remove_node(nodes)
+                if nodes == max_node:
+                    max_node = None
             # If the change state is 'StateChanged', update with changed state
             elif change == compressState.stateChange:
-                state_name = change_frame.node[nodes][compressState.stateChangedName]
-                assert (focus_frame.node[nodes][state_name] == change_frame.node[nodes][compressState.stateChangedFrom])
-                focus_frame.node[nodes][state_name] = change_frame.node[nodes][compressState.stateChangedTo]
+                state_name = node_data[compressState.stateChangedName]
+                assert (focus_frame.node[nodes][state_name] == node_data[compressState.stateChangedFrom])
+                focus_frame.node[nodes][state_name] = node_data[compressState.stateChangedTo]
         
-        processed = []
+        directed = focus_frame.is_directed()
+        processed = set()
         # Loop over the edges in the compressed frame
-        for edges in change_frame.edges_iter():
+        for start, end, edge_data in change_frame.edges_iter(data=True):
             # Extract start and end nodes for the edge
-            start = edges[0]
-            end = edges[1]
-            change = change_frame.edge[start][end].pop(compressState.tag)
+            start = update_map.get(start, start)
+            end = update_map.get(end, end)
+            change = edge_data[compressState.tag]
             
             #skip undirected edges that have already been changed
-            if not nx.is_directed(focus_frame) and (end, start) in processed:
+            if not directed and (end, start) in processed:
                 continue
             
             # Was this edge added
             if change == compressState.added:
-                focus_frame.add_edge(start, end, change_frame.edge[start][end])
+                add_data = dict(edge_data)
+                del add_data[compressState.tag]
+                focus_frame.add_edge(start, end, add_data)
             # Or was it deleted
             elif change == compressState.deleted:
                 # If it was deleted check to make sure the deletion of the nodes didn't already
@@ -762,50 +1679,86 @@ class NetworkFrames(object):
                     focus_frame.remove_edge(start, end)
                     # If the change state is 'StateChanged', update with changed state
             elif change == compressState.stateChange:
-                state_name = change_frame.edge[start][end][compressState.stateChangedName]
-                assert (focus_frame.edge[start][end][state_name] == change_frame.edge[start][end][compressState.stateChangedFrom])
-                focus_frame.edge[start][end][state_name] = change_frame.edge[start][end][compressState.stateChangedTo]
-            processed.append((start, end))
+                state_name = edge_data[compressState.stateChangedName]
+                assert (focus_frame.edge[start][end][state_name] == edge_data[compressState.stateChangedFrom])
+                focus_frame.edge[start][end][state_name] = edge_data[compressState.stateChangedTo]
+            processed.add((start, end))
                     
-    def processNetworkFrames(self):
+    def processNetworkFrames(self, centrality=centralityMode.exact, errorBound=0.05, workers=None):
         """ Processes the input frams adding network statistics to the nodes.
-          
+        
         Parameters
         ----------
-        None
+        centrality : centralityMode value
+           centralityMode.exact (default) computes the betweenness and closeness centralities of every frame
+           from scratch.  centralityMode.incremental keeps the values of the previous frame and only
+           recomputes the connected components holding nodes whose edges changed, giving the same values
+           as exact.  centralityMode.approximate also estimates the betweenness of those components from
+           a random sample of pivots, large enough for every betweenness normalized by (n-1)(n-2) to be
+           within errorBound of the exact value with probability 0.9.  The clustering coefficients
+           are updated in the same way by both of these modes.
+        
+        errorBound : float
+           Error bound of the approximate betweenness
+        
+        workers : integer
+           Number of worker processes used to compute the statistics of runs of frames.  None (default) or 1
+           processes the frames serially in this process.  The incremental and approximate modes start
+           over at the first frame of each run.
         
         Returns
         ----------
         None
-          
+        
+        Example
+        -------
+        
+        >>>myNetworkFrames.processNetworkFrames(NetworkFrames.centralityMode.approximate, 0.1)
+        
         """
-        current_frame = 0
-        # Loop over all frames
-        while current_frame < len(self.inputFrames):
-            processed_graph = self.getInputNetworkAt(current_frame)
-            degree = processed_graph.degree()
-            if processed_graph.is_directed():
-                in_degree_centrality = processed_graph.in_degree()
-                out_degree_centrality = processed_graph.out_degree()
-            else:
-                cluster_coefficient = nx.cluster.clustering(processed_graph)
-            betweenness_centrality = nx.betweenness_centrality(processed_graph, normalized=False)
-            closeness_centrality = nx.closeness.closeness_centrality(processed_graph, normalized=False)
-            num_nodes = 0
-            while num_nodes < len(processed_graph.nodes()):
-                node = processed_graph.nodes()[num_nodes]
-                processed_graph.node[node][processState.degree] = degree[node]
-                if processed_graph.is_directed():
-                    processed_graph.node[node][processState.degreeIn] = in_degree_centrality[node]
-                    processed_graph.node[node][processState.degreeOut] = out_degree_centrality[node]
-                else:
-                    processed_graph.node[node][processState.cluster] = cluster_coefficient[node]
-                processed_graph.node[node][processState.closeness] = closeness_centrality[node]
-                processed_graph.node[node][processState.betweenness] = betweenness_centrality[node]
-                num_nodes += 1
-                
-            self._addProcessedFrame(processed_graph)
-            current_frame += 1
+        if centrality not in centralityMode.allModes:
+            raise ValueError('Unsupported centrality mode: ' + str(centrality))
+        if workers is not None and workers > 1 and sys.platform != 'win32' and len(self.inputFrames) > 1:
+            self._processFramesInPool(centrality, errorBound, workers)
+            return
+        frames = (self.getInputNetworkAt(index) for index in xrange(len(self.inputFrames)))
+        for processed_graph, statistics in _frameStatistics(frames, centrality, errorBound):
+            for node, data in processed_graph.nodes_iter(data=True):
+                for statistic, values in statistics.iteritems():
+                    data[statistic] = values[node]
+            # processed_graph is already a copy of the input frame
+            self._addProcessedFrame(processed_graph, False)
+    
+    def _processFramesInPool(self, centrality, errorBound, workers):
+        # Computes the statistics of runs of frames in forked worker processes and annotates copies of the
+        # input frames with them in frame order.  Each run starts from the exact centralities of its first frame.
+        global _poolNetwork
+        frameCount = len(self.inputFrames)
+        runSize = max(1, -(-frameCount // (workers * 4)))
+        runs = [(start, min(start + runSize, frameCount), centrality, errorBound) for start in xrange(0, frameCount, runSize)]
+        _poolNetwork = self
+        try:
+            pool = multiprocessing.Pool(workers)
+            try:
+                results = pool.map(_processFrameRun, runs)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            _poolNetwork = None
+        index = 0
+        for result in results:
+            for nodes, columns in result:
+                frame = self.getInputNetworkAt(index, False)
+                node = dict((n, dict(data)) for n, data in frame.node.iteritems())
+                for statistic, column in columns.iteritems():
+                    for n, value in itertools.izip(nodes, column.tolist()):
+                        node[n][statistic] = value
+                processed_graph = _buildFrame(frame.is_directed(), node,
+                                              [(start, end, dict(data)) for start, end, data in frame.edges_iter(data=True)])
+                processed_graph.graph = dict(frame.graph)
+                self._addProcessedFrame(processed_graph, False)
+                index += 1
     
     def getNumNodesAdded(self, network):
         nodes_added = 0
@@ -32,6 +32,7 @@ class Rewriting(object):
         self.leftSubgraphs = []
         self.rightSubgraphs = []
         self.uniqueExtractionSubgraphs = {}
+        self.uniqueExtractionBuckets = {}
         self.firstRun = True
         self.dataDisplay = Display.display(False)
         self.utility = Utility.utility()
@@ -73,24 +74,21 @@ class Rewriting(object):
         
         # Clear the extraction subgraph list
         self.uniqueExtractionSubgraphs = {}
+        self.uniqueExtractionBuckets = {}
         
-        # Find all the unique extraction subgraphs from the adaptive network.
-        index = 1
-        self.uniqueExtractionSubgraphs[self.network._getExtractionSubgraphAt(0)] = [index]
-        self.dataDisplay.addInputValue(int(self.network._getExtractionSubgraphAt(0).name))
-        while index < len(self.network.getExtractionSubgraphs()):
-            isoFound = False
-            compareGraph = self.network._getExtractionSubgraphAt(index)
-            for graph in self.uniqueExtractionSubgraphs.iterkeys():
-                if self.utility.isIsomorphic(graph,compareGraph):
-                    isoFound = True
-                    self.uniqueExtractionSubgraphs[graph].append(index+1)
-                    self.dataDisplay.addInputValue(int(graph.name))
-                    break
-            if not isoFound:
-                self.uniqueExtractionSubgraphs[compareGraph] = [index+1]
-                self.dataDisplay.addInputValue(int(compareGraph.name))
-            index += 1
+        # Group the extraction subgraphs of the adaptive network by isomorphism class.  The classes are
+        # computed (or loaded from the frame archive) by the network frames, and the unique graphs are
+        # bucketed by their isomorphism invariant so performRewriting only compares within a bucket.
+        uniqueGraphs = {}
+        for index, representative in enumerate(self.network.getExtractionClasses()):
+            if representative not in uniqueGraphs:
+                graph = self.network._getExtractionSubgraphAt(representative, False)
+                uniqueGraphs[representative] = graph
+                self.uniqueExtractionSubgraphs[graph] = []
+                self.uniqueExtractionBuckets.setdefault(self.utility.isomorphismInvariant(graph), []).append(graph)
+            graph = uniqueGraphs[representative]
+            self.uniqueExtractionSubgraphs[graph].append(index+1)
+            self.dataDisplay.addInputValue(int(graph.name))
         
         print "Done.\n"
     
@@ -115,17 +113,18 @@ class Rewriting(object):
             self.network.writeSpecificGraphs("UniqueExtractedSubgraphs.graphML", graphList)   
             self.firstRun = False
             
-        for uniqueGraph in self.uniqueExtractionSubgraphs.iterkeys():
+        candidates = self.uniqueExtractionBuckets.get(self.utility.isomorphismInvariant(extractionSubgraph), [])
+        for uniqueGraph in candidates:
             if self.utility.isIsomorphic(extractionSubgraph,uniqueGraph):
                 rewritingIndex = random.choice(self.uniqueExtractionSubgraphs[uniqueGraph])
-                delta = self.network._getCompressedNetworkAt(rewritingIndex)
+                delta = self.network._getCompressedNetworkAt(rewritingIndex, False)
                 delta = self.makeNodeLabelsDisjoint(extractionSubgraph, delta)
                 associatedExtraction = Extraction.Extraction().getExtractionSubgraphFromDelta(delta)
                 #mapping = self.isIsomorphic(associatedExtraction, extractionSubgraph,True)
-                mapping = self.utility.findSubgraphInstances(extractionSubgraph, associatedExtraction)
-                #if len(mapping) < 1:
+                mapping = next(self.utility.iterSubgraphInstances(extractionSubgraph, associatedExtraction, 1), None)
+                #if mapping is None:
                    #print "Error in mapping rewriting during simulation!"
-                rewritingEvent = NetworkFrames.nx.relabel_nodes(delta,mapping[0],copy=True) if len(mapping) > 0 else delta
+                rewritingEvent = NetworkFrames.nx.relabel_nodes(delta,mapping,copy=True) if mapping is not None else delta
                 #rewritingEvent = self._generateRewritingEventFromExtraction(extractionSubgraph, delta, mapping)
                 
                 assert(self.network.getNumEdgesAdded(rewritingEvent) == self.network.getNumEdgesAdded(delta))
@@ -0,0 +1,140 @@
+"""
+Weighted random samplers used for the roulette wheel selections of the GNA
+
+"""
+__author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
+                            'Benjamin Bush (benjaminjamesbush@gmail.com)',
+                            'Hiroki Sayama (sayama@binghamton.edu)'])
+
+__all__ = ['AliasSampler', 'FenwickSampler', 'draw', 'update', 'getWeight', 'getTotal']
+
+
+#    Copyright (C) 2012 by
+#    Jeffrey Schmidt <jschmid1@binghamton.edu>
+#    Benjamin Bush <benjaminjamesbush@gmail.com>
+#    Hiroki Sayama <sayama@binghamton.edu>
+#    All rights reserved.
+#    BSD license.
+
+import random
+
+class AliasSampler(object):
+    """Draws indices with probability proportional to a fixed list of weights using Walker's alias
+    method.  Building the tables is O(n) and every draw is O(1).  Indices with a weight of 0 are never
+    drawn.
+
+    Parameters
+    ----------
+    weights : list of non-negative numbers
+
+    Example
+    -------
+
+    >>>sampler = Sampling.AliasSampler([1, 3, 0, 2])
+    >>>sampler.draw()
+    1
+    """
+    def __init__(self, weights):
+        total = float(sum(weights))
+        if not total > 0:
+            raise ValueError('At least one weight must be positive')
+        count = len(weights)
+        self.probability = [0.] * count
+        self.alias = range(count)
+        scaled = [weight * count / total for weight in weights]
+        small = [index for index in xrange(count) if scaled[index] < 1.]
+        large = [index for index in xrange(count) if scaled[index] >= 1.]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = (scaled[more] + scaled[less]) - 1.
+            if scaled[more] < 1.:
+                small.append(more)
+            else:
+                large.append(more)
+        # What is left over is 1 up to rounding, except for zero weights, which must never be returned
+        heaviest = max(xrange(count), key=lambda index: weights[index])
+        for index in small + large:
+            if weights[index] > 0:
+                self.probability[index] = 1.
+            else:
+                self.alias[index] = heaviest
+
+    def draw(self):
+        """Returns a random index, drawn with probability proportional to its weight."""
+        index = int(random.random() * len(self.probability))
+        return index if random.random() < self.probability[index] else self.alias[index]
+
+class FenwickSampler(object):
+    """Draws indices with probability proportional to weights that can change between draws.  The
+    weights are kept in a Fenwick (binary indexed) tree, so draws and weight updates are O(log n).
+    Indices with a weight of 0 are never drawn.
+
+    Parameters
+    ----------
+    weights : list of non-negative numbers
+
+    Example
+    -------
+
+    >>>sampler = Sampling.FenwickSampler([1, 3, 0, 2])
+    >>>sampler.update(1, 0)
+    >>>sampler.draw()
+    3
+    """
+    def __init__(self, weights):
+        self.weights = [0.] * len(weights)
+        self.tree = [0.] * (len(weights) + 1)
+        self.positive = 0
+        for index, weight in enumerate(weights):
+            self.update(index, weight)
+
+    def update(self, index, weight):
+        """Sets the weight of index."""
+        if weight < 0:
+            raise ValueError('Weights must not be negative')
+        change = weight - self.weights[index]
+        self.positive += (weight > 0) - (self.weights[index] > 0)
+        self.weights[index] = weight
+        position = index + 1
+        while position < len(self.tree):
+            self.tree[position] += change
+            position += position & -position
+
+    def getWeight(self, index):
+        """Returns the weight of index."""
+        return self.weights[index]
+
+    def getTotal(self):
+        """Returns the sum of the weights."""
+        if self.positive == 0:
+            return 0.
+        total = 0.
+        position = len(self.weights)
+        while position > 0:
+            total += self.tree[position]
+            position -= position & -position
+        return total
+
+    def draw(self):
+        """Returns a random index, drawn with probability proportional to its weight.  A ValueError is
+        raised when all the weights are 0."""
+        if self.positive == 0:
+            raise ValueError('All weights are zero')
+        remaining = random.random() * self.getTotal()
+        position = 0
+        step = 1
+        while step * 2 <= len(self.weights):
+            step *= 2
+        while step > 0:
+            if position + step <= len(self.weights) and self.tree[position + step] <= remaining:
+                position += step
+                remaining -= self.tree[position]
+            step //= 2
+        if position < len(self.weights) and self.weights[position] > 0:
+            return position
+        # Rounding in the tree sums landed on a zero weight, take the closest index that can be drawn
+        return min((index for index in xrange(len(self.weights)) if self.weights[index] > 0),
+                   key=lambda index: abs(index - position))
@@ -123,37 +123,37 @@ class Simulation(object):
                 if first:
                     #Avg. shortest path length
                     try:
-                        self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(self.networkFrames.getInputNetworkAt(frame_number)))
+                        self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(self.networkFrames.getInputNetworkAt(frame_number, False)))
                     except Exception:
                         try:
-                            self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number))[0]))
+                            self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number, False))[0]))
                         except Exception:
                             self.avgShortestPathDisplay.addInputValue(0)
                             
                     #Density
                     try:
-                        self.densityDisplay.addInputValue(nx.density(self.networkFrames.getInputNetworkAt(frame_number)))
+                        self.densityDisplay.addInputValue(nx.density(self.networkFrames.getInputNetworkAt(frame_number, False)))
                     except Exception:
                         try:
-                            self.densityDisplay.addInputValue(nx.density(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number))[0]))
+                            self.densityDisplay.addInputValue(nx.density(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number, False))[0]))
                         except Exception:
                             self.densityDisplay.addInputValue(0)
                             
                     #Num Nodes display
                     try:
-                        self.nodesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number).nodes()))
+                        self.nodesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number, False).nodes()))
                     except Exception:
                         self.nodesDisplay.addInputValue(0)
                     
                     #Edges display
                     try:
-                        self.edgesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number).edges()))
+                        self.edgesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number, False).edges()))
                     except Exception:
                         self.edgesDisplay.addInputValue(0)
                         
                     #Average Clustering
                     try:
-                        self.avgClusteringDisplay.addInputValue(nx.average_clustering(self.networkFrames.getInputNetworkAt(frame_number)))
+                        self.avgClusteringDisplay.addInputValue(nx.average_clustering(self.networkFrames.getInputNetworkAt(frame_number, False)))
                     except Exception:
                         self.avgClusteringDisplay.addInputValue(0)
                         
@@ -161,43 +161,43 @@ class Simulation(object):
                 
                 #Avg. Shortest Path
                 try:
-                    self.avgShortestPathDisplay.addExperimentalValue(nx.average_shortest_path_length(networks.getInputNetworkAt(frame_number)))
+                    self.avgShortestPathDisplay.addExperimentalValue(nx.average_shortest_path_length(networks.getInputNetworkAt(frame_number, False)))
                 except Exception:
                     try:
-                        self.avgShortestPathDisplay.addExperimentalValue(nx.average_shortest_path_length(nx.connected_component_subgraphs(networks.getInputNetworkAt(frame_number))[0]))
+                        self.avgShortestPathDisplay.addExperimentalValue(nx.average_shortest_path_length(nx.connected_component_subgraphs(networks.getInputNetworkAt(frame_number, False))[0]))
                     except Exception:
                         self.avgShortestPathDisplay.addExperimentalValue(0)
                         
                 #Density
                 try:
-                    self.densityDisplay.addExperimentalValue(nx.density(networks.getInputNetworkAt(frame_number)))
+                    self.densityDisplay.addExperimentalValue(nx.density(networks.getInputNetworkAt(frame_number, False)))
                 except Exception:
                     try:
-                        self.densityDisplay.addExperimentalValue(nx.density(nx.connected_component_subgraphs(networks.getInputNetworkAt(frame_number))[0]))
+                        self.densityDisplay.addExperimentalValue(nx.density(nx.connected_component_subgraphs(networks.getInputNetworkAt(frame_number, False))[0]))
                     except Exception:
                         self.densityDisplay.addExperimentalValue(0)   
                         
                 #Num Nodes display
                 try:
-                    self.nodesDisplay.addExperimentalValue(len(networks.getInputNetworkAt(frame_number).nodes()))
+                    self.nodesDisplay.addExperimentalValue(len(networks.getInputNetworkAt(frame_number, False).nodes()))
                 except Exception:
                     self.nodesDisplay.addExperimentalValue(0)
                 
                 #Num edges display
                 try:
-                    self.edgesDisplay.addExperimentalValue(len(networks.getInputNetworkAt(frame_number).edges()))
+                    self.edgesDisplay.addExperimentalValue(len(networks.getInputNetworkAt(frame_number, False).edges()))
                 except Exception:
                     self.edgesDisplay.addExperimentalValue(0)
                     
                 #Clustering
                 try:
-                    self.avgClusteringDisplay.addExperimentalValue(nx.average_clustering(networks.getInputNetworkAt(frame_number)))
+                    self.avgClusteringDisplay.addExperimentalValue(nx.average_clustering(networks.getInputNetworkAt(frame_number, False)))
                 except Exception:
                     self.avgClusteringDisplay.addExperimentalValue(0)
                     
                 # BD cumulative degree dist
-                input_cum_degree = self.utility.generateCumulativeDegDist(self.networkFrames.getInputNetworkAt(frame_number))
-                simulated_cum_degree = self.utility.generateCumulativeDegDist(networks.getInputNetworkAt(frame_number))
+                input_cum_degree = self.utility.generateCumulativeDegDist(self.networkFrames.getInputNetworkAt(frame_number, False))
+                simulated_cum_degree = self.utility.generateCumulativeDegDist(networks.getInputNetworkAt(frame_number, False))
                 processed_cum_degree = self.utility.processCumDegreeForBD(input_cum_degree, simulated_cum_degree)
                 self.bhattacharyyaDegreeDisplay.addInputValue(self.utility.BhattacharyyaDistance(processed_cum_degree[0],processed_cum_degree[1]))
                 
@@ -224,8 +224,8 @@ class Simulation(object):
             self.bhattacharyyaDegreeDisplay.appendInputValuesToList()
             self.bhattacharyyaDegreeDisplay.clearInputValues()
         
-        input_cumulative_deg_dist = self.utility.generateCumulativeDegDist(self.networkFrames.getInputNetworkAt(len(self.networkFrames.getInputNetworks())-1))
-        simulated_cumulative_deg_dist = self.utility.generateCumulativeDegDist(self.meanNetwork.getInputNetworkAt(len(self.networkFrames.getInputNetworks())-1))
+        input_cumulative_deg_dist = self.utility.generateCumulativeDegDist(self.networkFrames.getInputNetworkAt(len(self.networkFrames.getInputNetworks())-1, False))
+        simulated_cumulative_deg_dist = self.utility.generateCumulativeDegDist(self.meanNetwork.getInputNetworkAt(len(self.networkFrames.getInputNetworks())-1, False))
         self.cumulativeDegreeDist.addInputXValueList(input_cumulative_deg_dist[0])
         self.cumulativeDegreeDist.addInputYValueList(input_cumulative_deg_dist[1])
         self.cumulativeDegreeDist.addExperimentalXValueList(simulated_cumulative_deg_dist[0])
@@ -235,43 +235,43 @@ class Simulation(object):
     def generateDisplayDataAtIndex(self, index):
            
         print "Generating Results..."
-        input_network = self.networkFrames.getInputNetworkAt(index)
+        input_network = self.networkFrames.getInputNetworkAt(index, False)
         sim_network = self.simulationNetwork[index]
         frame_number = index
 
         #Avg. shortest path length
         try:
-            self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(self.networkFrames.getInputNetworkAt(frame_number)))
+            self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(self.networkFrames.getInputNetworkAt(frame_number, False)))
         except Exception:
             try:
-                self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number))[0]))
+                self.avgShortestPathDisplay.addInputValue(nx.average_shortest_path_length(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number, False))[0]))
             except Exception:
                 self.avgShortestPathDisplay.addInputValue(0)
                 
         #Density
         try:
-            self.densityDisplay.addInputValue(nx.density(self.networkFrames.getInputNetworkAt(frame_number)))
+            self.densityDisplay.addInputValue(nx.density(self.networkFrames.getInputNetworkAt(frame_number, False)))
         except Exception:
             try:
-                self.densityDisplay.addInputValue(nx.density(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number))[0]))
+                self.densityDisplay.addInputValue(nx.density(nx.connected_component_subgraphs(self.networkFrames.getInputNetworkAt(frame_number, False))[0]))
             except Exception:
                 self.densityDisplay.addInputValue(0)
                 
         #Num Nodes display
         try:
-            self.nodesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number).nodes()))
+            self.nodesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number, False).nodes()))
         except Exception:
             self.nodesDisplay.addInputValue(0)
         
         #Edges display
         try:
-            self.edgesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number).edges()))
+            self.edgesDisplay.addInputValue(len(self.networkFrames.getInputNetworkAt(frame_number, False).edges()))
         except Exception:
             self.edgesDisplay.addInputValue(0)
             
         #Average Clustering
         try:
-            self.avgClusteringDisplay.addInputValue(nx.average_clustering(self.networkFrames.getInputNetworkAt(frame_number)))
+            self.avgClusteringDisplay.addInputValue(nx.average_clustering(self.networkFrames.getInputNetworkAt(frame_number, False)))
         except Exception:
             self.avgClusteringDisplay.addInputValue(0)
                 
@@ -314,7 +314,7 @@ class Simulation(object):
             self.avgClusteringDisplay.addExperimentalValue(0)
             
         # BD cumulative degree dist
-        input_cum_degree = self.utility.generateCumulativeDegDist(self.networkFrames.getInputNetworkAt(frame_number))
+        input_cum_degree = self.utility.generateCumulativeDegDist(self.networkFrames.getInputNetworkAt(frame_number, False))
         simulated_cum_degree = self.utility.generateCumulativeDegDist(self.simulationNetwork[frame_number])
         processed_cum_degree = self.utility.processCumDegreeForBD(input_cum_degree, simulated_cum_degree)
         self.bhattacharyyaDegreeDisplay.addInputValue(self.utility.BhattacharyyaDistance(processed_cum_degree[0],processed_cum_degree[1]))
@@ -363,7 +363,7 @@ class Simulation(object):
             
             print "Recreating Input Network..."
             # Set the initial configuration
-            start_frame = self.networkFrames.getInputNetworkAt(0)
+            start_frame = self.networkFrames.getInputNetworkAt(0, False)
             
             for iteration in range(self.iterations):
                 print str(iteration+1),
@@ -412,7 +412,7 @@ class Simulation(object):
             print "Recreating Input Network..."
             # Set the initial configuration
             self.extraction.generateExtractionTree()
-            startFrame = self.networkFrames.getInputNetworkAt(0)
+            startFrame = self.networkFrames.getInputNetworkAt(0, False)
             bargraph = Display.display()
             for iteration in range(self.iterations):
                 print str(iteration+1),
@@ -487,7 +487,7 @@ class Simulation(object):
         if len(self.networkFrames.getInputNetworks()) > 0:    
             print "Recreating Input Network..."
             # Set the initial configuration
-            startFrame = self.networkFrames.getInputNetworkAt(0)
+            startFrame = self.networkFrames.getInputNetworkAt(0, False)
             focusFrame = startFrame.copy()
             self.addGraphToSimulatedNetwork(focusFrame)            
             for network_index in xrange(1,len(self.networkFrames._getCompressedNetworks())):
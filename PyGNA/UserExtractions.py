@@ -7,7 +7,7 @@ __author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
                             'Benjamin Bush (benjaminjamesbush@gmail.com)',
                             'Hiroki Sayama (sayama@binghamton.edu)'])
 
-__all__ = ['getModels','buildModels']
+__all__ = ['getModels','buildModels', 'CompiledUserModel', 'getNodeValues']
 
 
 #    Copyright (C) 2012 by
@@ -17,11 +17,15 @@ __all__ = ['getModels','buildModels']
 #    All rights reserved.
 #    BSD license.
 
+import ast
 import inspect
 import string
 import re
 import itertools
 import copy
+import numpy
+import networkx as nx
+import Features
 import Model
 import gna
 
@@ -53,52 +57,130 @@ class UserExtractions(object):
             sourceLines = inspect.getsourcelines(eval('self.' + fName))[0]
             indent = re.search('\w', sourceLines[0]).start()
             sourceLines = [line[indent:] for line in sourceLines] #indentation removed
-            s = string.join(sourceLines) #the source that goes with the function with the name fName
-            x = ""
-            x += "def f314159(G, nodeID, stateName):\n"#1   #this is the costructed function
-            x += "    errorString = False\n"
-            x += '    sourceText = """'+ s +'"""\n'
-            x += "    import networkx as nx\n" #2
-            x += "    degree = G.degree(nodeID)\n"#3
-            x += "    useState = True\n"#4
-            x += "    for n in G.nodes():\n"#5
-            x += "        if stateName not in G.node[n]:\n"#6
-            x += "            useState = False\n"#7
-            x += "            if stateName != None:\n"
-            x += "                raise KeyError('At some point, node ' + str(n) + ' did not contain information about ' + str(stateName))\n"
-            x += "    if useState:\n"#8
-            x += "        state = G.node[nodeID][stateName]\n"#9
-            x += "        neighborStates = [G.node[neighborID][stateName] for neighborID in G.neighbors(nodeID)]\n"#12
-            x += "    elif 'state' in sourceText or 'neighborStates' in sourceText:\n"
-            x += "        raise KeyError('state and neighborStates can not be defined for this graph, as it contains no state information.')\n"
-            x += "    if 'predecessors' in dir(G) and  'successors' in dir(G):\n"#13
-            x += "        inDegree = G.in_degree(nodeID)\n"#14
-            x += "        outDegree = G.out_degree(nodeID)\n"#15
-            x += "        if 'clustering' in sourceText:\n"
-            x += "            raise KeyError('Clustering is not defined for directed graphs.')\n"
-            x += "        if useState:\n"#16
-            x += "            inNeighborStates = [G.node[neighborID][stateName] for neighborID in G.predecessors(nodeID)]\n"#17
-            x += "            outNeighborStates = [G.node[neighborID][stateName] for neighborID in G.successors(nodeID)]\n"#18
-            x += "    else:\n"#19
-            x += "        clustering = nx.clustering(G,nodeID)\n"#20
-            x += "        if 'inDegree' in sourceText:\n"
-            x += "            raise KeyError('inDegree is not defined for undirected graphs.')\n"
-            x += "        if 'outDegree' in sourceText:\n"
-            x += "            raise KeyError('outDegree is not defined for undirected graphs.')\n"
-            x += "        if 'inNeighborStates' in sourceText:\n"
-            x += "            raise KeyError('inNeighborSates is not defined for undirected graphs.')\n"
-            x += "        if 'outNeighborStates' in sourceText:\n"
-            x += "            raise KeyError('outNeighborSates is not defined for undirected graphs.')\n"
-            x += "    betweennessCentrality = nx.betweenness_centrality(G)[nodeID]\n"#21
-            x += "    bCentrality = betweennessCentrality\n"#22
-            x += "    closenessCentrality = nx.closeness_centrality(G)[nodeID]\n"#23
-            x += "    cCentrality = closenessCentrality\n"#The environment to do what the user wanted is now set up #24
-            x += "    assert nodeID in G.nodes()\n"#25
-            x += "    "+s+"\n"#
-
-            x += "    userFunction = "+fName+"\n"#27
-            x += "    return userFunction()\n"#28
-            exec(x) in locals(), globals()
-            self.models.append(Model.Model(f314159,fName))
-        
-    
+            s = string.join(sourceLines, '') #the source that goes with the function with the name fName
+            compiledModel = CompiledUserModel(fName, s)
+            self.models.append(Model.Model(compiledModel.getModel(), fName, compiledModel.getVectorizedModel()))
+
+class CompiledUserModel(object):
+    """A user function written in the domain specific language of UserExtractions, compiled once.  The
+    primitives the function references are found from its source, and only those are computed.  Whole
+    graph primitives, such as the centralities, are computed once per graph and shared by all the user
+    models through Features.NodeFeatures, and the function is then called once per node of the graph.
+    The per node values are kept with the features, so scoring any number of subgraphs of the same graph
+    costs a sum over their rows.
+
+    Parameters
+    ----------
+    fName : string
+       Name of the user function
+
+    source : string
+       Source of the user function, without indentation
+
+    Example
+    -------
+
+    >>>compiledModel = CompiledUserModel('nodeDegree', 'def nodeDegree():\n    return degree\n')
+    >>>model = Model.Model(compiledModel.getModel(), 'nodeDegree', compiledModel.getVectorizedModel())
+    """
+    def __init__(self, fName, source):
+        self.name = fName
+        tree = ast.parse(source)
+        self.references = set(node.id for node in ast.walk(tree) if isinstance(node, ast.Name))
+        # The primitives are globals of the user function, set for each node before it is called
+        self.environment = {'nx': nx}
+        exec compile(tree, '<user extraction %s>' % fName, 'exec') in self.environment
+        self.userFunction = self.environment[fName]
+
+    def getModel(self):
+        """Returns the model function, function(G, subgraph, stateName), the sum of the user function
+        over the nodes of subgraph."""
+        return self.modelValue
+
+    def getVectorizedModel(self):
+        """Returns the vectorized model function, function(features, rows), the sum of the user function
+        over the nodes at rows of a Features.NodeFeatures object."""
+        return self.vectorizedValue
+
+    def modelValue(self, G, subgraph, stateName):
+        features = Features.getNodeFeatures(G, stateName)
+        return self.vectorizedValue(features, features.getRows(subgraph.nodes_iter()))
+
+    def vectorizedValue(self, features, rows):
+        return self.getNodeValues(features)[rows].sum()
+
+    def getNodeValues(self, features):
+        """Returns the value of the user function for every node of the graph of features, in row order.
+
+        Parameters
+        ----------
+        features : Features.NodeFeatures
+           Features of the graph the user function is evaluated on
+
+        Returns
+        -------
+        values : numpy array (float)
+        """
+        return features.getColumn(('userExtraction', id(self)), lambda: self._evaluate(features))
+
+    def _evaluate(self, features):
+        G = features.getGraph()
+        stateName = features.stateName
+        references = self.references
+        useState = features.stateCodes is not None
+        if not useState and stateName != None:
+            n = [n for n in features.nodes if stateName not in G.node[n]][0]
+            raise KeyError('At some point, node ' + str(n) + ' did not contain information about ' + str(stateName))
+        if not useState and references & set(['state', 'neighborStates', 'inNeighborStates', 'outNeighborStates']):
+            raise KeyError('state and neighborStates can not be defined for this graph, as it contains no state information.')
+        if G.is_directed():
+            if 'clustering' in references:
+                raise KeyError('Clustering is not defined for directed graphs.')
+        else:
+            for primitive, message in [('inDegree', 'inDegree is not defined for undirected graphs.'),
+                                       ('outDegree', 'outDegree is not defined for undirected graphs.'),
+                                       ('inNeighborStates', 'inNeighborSates is not defined for undirected graphs.'),
+                                       ('outNeighborStates', 'outNeighborSates is not defined for undirected graphs.')]:
+                if primitive in references:
+                    raise KeyError(message)
+
+        # Whole graph primitives, computed once per graph for all the user models that reference them
+        graphPrimitives = {}
+        if 'clustering' in references:
+            graphPrimitives['clustering'] = features.getColumn('clustering', lambda: nx.clustering(G))
+        if references & set(['betweennessCentrality', 'bCentrality']):
+            betweenness = features.getColumn('betweennessCentrality', lambda: nx.betweenness_centrality(G))
+            graphPrimitives['betweennessCentrality'] = graphPrimitives['bCentrality'] = betweenness
+        if references & set(['closenessCentrality', 'cCentrality']):
+            closeness = features.getColumn('closenessCentrality', lambda: nx.closeness_centrality(G))
+            graphPrimitives['closenessCentrality'] = graphPrimitives['cCentrality'] = closeness
+        graphPrimitives = [(primitive, values) for primitive, values in graphPrimitives.items() if primitive in references]
+
+        nodeData = G.node
+        environment = self.environment
+        environment['G'] = G
+        environment['stateName'] = stateName
+        values = numpy.zeros(len(features.nodes))
+        try:
+            for row, nodeID in enumerate(features.nodes):
+                environment['nodeID'] = nodeID
+                if 'degree' in references:
+                    environment['degree'] = int(features.degree[row])
+                if 'inDegree' in references:
+                    environment['inDegree'] = G.in_degree(nodeID)
+                if 'outDegree' in references:
+                    environment['outDegree'] = G.out_degree(nodeID)
+                if 'state' in references:
+                    environment['state'] = nodeData[nodeID][stateName]
+                if 'neighborStates' in references:
+                    environment['neighborStates'] = [nodeData[neighborID][stateName] for neighborID in G.neighbors_iter(nodeID)]
+                if 'inNeighborStates' in references:
+                    environment['inNeighborStates'] = [nodeData[neighborID][stateName] for neighborID in G.predecessors_iter(nodeID)]
+                if 'outNeighborStates' in references:
+                    environment['outNeighborStates'] = [nodeData[neighborID][stateName] for neighborID in G.successors_iter(nodeID)]
+                for primitive, primitiveValues in graphPrimitives:
+                    environment[primitive] = primitiveValues[nodeID]
+                values[row] = self.userFunction()
+        finally:
+            environment['G'] = None
+        return values
@@ -4,18 +4,172 @@ import copy
 from itertools import groupby
 import itertools
 import random
-import sys
 from operator import itemgetter
 
 __author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
                             'Hiroki Sayama (sayama@binghamton.edu)'])
 
-__all__ = ['getSubgraphFrequency','findSubgraphInstances','BhattacharyyaDistance',
-           'generateCumulativeDegDist','isIsomorphic']
+__all__ = ['getSubgraphFrequency','findSubgraphInstances','iterSubgraphInstances','BhattacharyyaDistance',
+           'generateCumulativeDegDist','isIsomorphic','isIsomorphicFast','canonicalLabeling','canonicalCertificate',
+           'isomorphismInvariant']
+
+_exhausted = object()  # Returned by next() once a candidate iterator is used up
+
+class _HostGraph(object):
+    ''' The graph searched by findSubgraphInstances, less the nodes that have been excluded from the
+    search.  The graph itself is never modified; the degrees of the remaining nodes are updated as nodes
+    are excluded.
+    '''
+    def __init__(self, graph):
+        self.graph = graph
+        self.directed = graph.is_directed()
+        self.excluded = set()
+        self.size = len(graph)
+        if self.directed:
+            self.inDegree = graph.in_degree()
+            self.outDegree = graph.out_degree()
+        else:
+            self.degree = graph.degree()
+
+    def exclude(self, node):
+        self.excluded.add(node)
+        self.size -= 1
+        if self.directed:
+            for neighbor in self.graph.succ[node]:
+                if neighbor != node:
+                    self.inDegree[neighbor] -= 1
+            for neighbor in self.graph.pred[node]:
+                if neighbor != node:
+                    self.outDegree[neighbor] -= 1
+        else:
+            for neighbor in self.graph.adj[node]:
+                if neighbor != node:
+                    self.degree[neighbor] -= 1
+
+    def nodes(self):
+        return [node for node in self.graph.nodes_iter() if node not in self.excluded]
+
+    def neighbors(self, node):
+        return [neighbor for neighbor in self.graph.adj[node] if neighbor not in self.excluded]
+
+    def predecessors(self, node):
+        # networkx keeps the predecessors of every node of a directed graph
+        return [predecessor for predecessor in self.graph.pred[node] if predecessor not in self.excluded]
+
+    def fits(self, node, query, queryNode):
+        # Whether node has enough edges left to stand for queryNode
+        if self.directed:
+            return (self.inDegree[node] >= query.inDegree[queryNode] and
+                    self.outDegree[node] >= query.outDegree[queryNode])
+        return self.degree[node] >= query.degree[queryNode]
+
+class _QueryGraph(object):
+    ''' The subgraph searched for by findSubgraphInstances, with the degrees the search uses. '''
+    def __init__(self, graph):
+        self.graph = graph
+        self.nodes = graph.nodes()
+        self.degree = graph.degree()
+        self.isolated = 0 in self.degree.values()
+        if graph.is_directed():
+            self.inDegree = graph.in_degree()
+            self.outDegree = graph.out_degree()
+
+def _rankColors(nodes, keys):
+    # Numbers the distinct keys in sorted order, so the colours only depend on the keys
+    rank = dict((key, index) for index, key in enumerate(sorted(set(keys.itervalues()))))
+    return dict((node, rank[keys[node]]) for node in nodes)
+
+def _refineColors(nodes, adjacency, colors):
+    # Splits the colour classes by the multiset of (colour, edge label, direction) of the neighbors
+    # until the partition is stable
+    count = len(set(colors.itervalues()))
+    while True:
+        signatures = dict((node, (colors[node], tuple(sorted((colors[neighbor], label, direction)
+                                                             for neighbor, label, direction in adjacency[node]))))
+                          for node in nodes)
+        colors = _rankColors(nodes, signatures)
+        refinedCount = len(set(colors.itervalues()))
+        if refinedCount == count:
+            return colors
+        count = refinedCount
+
+def _canonicalLabeling(G, edgeData):
+    # Searches the individualisation-refinement tree for the leaf with the smallest certificate.  Leaves
+    # with equal certificates give automorphisms, which prune the branches that lead to equal leaves.
+    directed = G.is_directed()
+    nodes = G.nodes()
+    nodeLabels = dict((node, tuple(sorted(G.node[node].iteritems()))) for node in nodes)
+    edgeLabel = (lambda data: tuple(sorted(data.iteritems()))) if edgeData else (lambda data: ())
+    adjacency = {}
+    for node in nodes:
+        adjacency[node] = [(neighbor, edgeLabel(data), 0) for neighbor, data in G.adj[node].iteritems()]
+        if directed:
+            adjacency[node].extend((neighbor, edgeLabel(data), 1) for neighbor, data in G.pred[node].iteritems())
+    best = []
+    first = []
+    automorphisms = []
+    
+    def leafCertificate(colors):
+        order = sorted(nodes, key=colors.__getitem__)
+        edges = sorted((colors[node], colors[neighbor], label) for node in nodes
+                       for neighbor, label, direction in adjacency[node]
+                       if direction == 0 and (directed or colors[node] <= colors[neighbor]))
+        return (directed, tuple(nodeLabels[node] for node in order), tuple(edges)), order
+    
+    def orbitRoot(roots, node):
+        while roots[node] != node:
+            node = roots[node]
+        return node
+    
+    def search(prefix, colors):
+        # Returns the depth of the tree node whose search continues, which is the parent unless a leaf
+        # equivalent to the first leaf was found: the subtree it diverged from the first path at is then
+        # the image of an explored subtree, and the search jumps back to where it diverged
+        cells = {}
+        for node in nodes:
+            cells.setdefault(colors[node], []).append(node)
+        targets = [color for color, cell in cells.iteritems() if len(cell) > 1]
+        if not targets:
+            certificate, order = leafCertificate(colors)
+            if not first:
+                first[:] = [certificate, order, prefix]
+            elif certificate == first[0]:
+                automorphisms.append(dict(itertools.izip(order, first[1])))
+                depth = 0
+                while prefix[depth] == first[2][depth]:
+                    depth += 1
+                return depth
+            if not best or certificate < best[0]:
+                best[:] = [certificate, order]
+            elif certificate == best[0]:
+                automorphisms.append(dict(itertools.izip(order, best[1])))
+            return len(prefix) - 1
+        explored = []
+        roots = dict((n, n) for n in nodes)
+        processed = 0
+        for node in cells[min(targets)]:
+            # Nodes in the orbit of an explored node, under the automorphisms fixing prefix, lead to the same leaves
+            for automorphism in automorphisms[processed:]:
+                if all(automorphism[fixed] == fixed for fixed in prefix):
+                    for n in nodes:
+                        firstRoot, secondRoot = orbitRoot(roots, n), orbitRoot(roots, automorphism[n])
+                        if firstRoot != secondRoot:
+                            roots[firstRoot] = secondRoot
+            processed = len(automorphisms)
+            if any(orbitRoot(roots, node) == orbitRoot(roots, other) for other in explored):
+                continue
+            individualised = dict((n, (colors[n], 0 if n == node else 1)) for n in nodes)
+            depth = search(prefix + [node], _refineColors(nodes, adjacency, _rankColors(nodes, individualised)))
+            if depth < len(prefix):
+                return depth
+            explored.append(node)
+        return len(prefix) - 1
+    
+    search([], _refineColors(nodes, adjacency, _rankColors(nodes, nodeLabels)))
+    return best[0], best[1]
 
 class utility(object):
     def __init__(self):
-        sys.setrecursionlimit(10000)
         self.state = None
 
     def getSubgraphFrequency(self, Graph, subgraph, symbreak=True):
@@ -24,10 +178,39 @@ class utility(object):
     def findSubgraphInstances(self, Graph, subgraph,symbreak=True):
         ''' Grochow-Kellis Algorithm defined in
         Grochow, J., Kellis, M. "Network motif discovery using subgraph enumeration and symmetry-breaking."
+        
+        Returns the list of all the mappings generated by iterSubgraphInstances.
         ''' 
-        instances = []
-        baseGraph = copy.deepcopy(Graph)
+        return list(self.iterSubgraphInstances(Graph, subgraph, symbreak=symbreak))
+
+    def iterSubgraphInstances(self, Graph, subgraph, limit=None, symbreak=True):
+        """Generates the instances of subgraph in Graph found by the Grochow-Kellis algorithm, stopping
+        as soon as limit instances have been generated.  Graph is never modified: the nodes that have been
+        used as the first node of the mappings are excluded from the search instead of being removed.
+        
+        Parameters
+        ----------
+        Graph : networkx Graph()
+         - Graph to search
+         
+        subgraph : networkx Graph()
+         - Subgraph to search for
+         
+        limit : integer
+         - Maximum number of instances to generate, None (default) for all of them
+         
+        symbreak : boolean
+         - If True (default) instances that only differ by an automorphism of subgraph are generated once
+        
+        Returns
+        -------
+        generator of dicts : mapping of each node of subgraph to a node of Graph
         
+        Example
+        -------
+        
+        >>>mapping = next(util.iterSubgraphInstances(Graph, subgraph, 1), None)
+        """
         # Set state name if it exists
         if len(Graph.nodes()) > 0 and len(subgraph.nodes()) > 0:
             graphNode = Graph.nodes()[0]
@@ -39,34 +222,33 @@ class utility(object):
                     self.state = Graph.node[graphNode].keys()[0]
                 else:
                     raise AttributeError, "Incompatible state information between the two graphs"
+        if limit is not None and limit < 1:
+            return
             
         # Find the symmetry conditions if the flag has been set
         conditions = self.symmetryConditions(subgraph) if symbreak else []
         
-        # Sort nodes by degree then by neighbor degree sequence
-        graphNodesSorted = sorted(Graph.nodes(),
-                                  cmp=lambda x,y: baseGraph.degree(x) - baseGraph.degree(y))
-        '''graphNodesSorted = sorted(graphNodesSorted,
-                                  cmp=lambda x,y:sum([baseGraph.degree(i)for i in baseGraph.neighbors(x)]) - 
-                                  sum([baseGraph.degree(j) for j in baseGraph.neighbors(y)]))'''
+        host = _HostGraph(Graph)
+        query = _QueryGraph(subgraph)
+        # Sort nodes by degree
+        graphNodesSorted = sorted(Graph.nodes(), key=Graph.degree().__getitem__)
         
         # Iterate over all graph nodes
-        while len(graphNodesSorted)>0 and len(baseGraph.nodes()) >= len(subgraph.nodes()):
-            baseNode = graphNodesSorted[0]
-            for queryNode in subgraph.nodes_iter():
-                stateTest = True if not self.state else baseGraph.node[baseNode][self.state] == subgraph.node[queryNode][self.state]
-                degreeTest = (baseGraph.in_degree(baseNode) >= subgraph.in_degree(queryNode) and 
-                              baseGraph.out_degree(baseNode) >= subgraph.out_degree(queryNode)) if baseGraph.is_directed() else (baseGraph.degree(baseNode) >= subgraph.degree(queryNode))
-                if degreeTest and stateTest:
-                    f = {}
-                    f[queryNode] = baseNode
-                    isomorphs = self.isomorphicExtensions(f, baseGraph, subgraph,conditions, symbreak)
-                    instances.extend(isomorphs)
-            # Remove the node from the sorted list and from the graph
-            graphNodesSorted.remove(baseNode)
-            baseGraph.remove_node(baseNode)
-        # Return list of isomorphs
-        return instances
+        found = 0
+        for baseNode in graphNodesSorted:
+            if host.size < len(query.nodes):
+                break
+            for queryNode in query.nodes:
+                stateTest = True if not self.state else Graph.node[baseNode][self.state] == subgraph.node[queryNode][self.state]
+                if host.fits(baseNode, query, queryNode) and stateTest:
+                    mapping = {queryNode: baseNode}
+                    for instance in self.isomorphicExtensions(mapping, set([baseNode]), host, query, conditions, symbreak):
+                        yield instance
+                        found += 1
+                        if found == limit:
+                            return
+            # Leave the node out of the rest of the search
+            host.exclude(baseNode)
 
     def symmetryConditions(self, subgraph):
         ''' Symmetry breaking condition function defined in:
@@ -83,99 +265,103 @@ class utility(object):
             aut = [x for x in aut if x[m] == m]
         return conditions
     
-    def isomorphicExtensions(self, mapDict, Graph, subgraph, conditions, symbreak=True):
+    def isomorphicExtensions(self, mapping, used, host, query, conditions, symbreak):
         ''' Grochow-Kellis Algorithm defined in
         Grochow, J., Kellis, M. "Network motif discovery using subgraph enumeration and symmetry-breaking."
+        
+        Generates a copy of every complete extension of mapping (query node -> graph node).  The search is
+        depth first with an explicit stack of candidate iterators, one per mapped node; mapping and used
+        (the graph nodes in mapping) are extended in place and backtracked.
         '''         
-        isomorphs = []
         # If all the nodes of the query subgraph "subgraph" exist in the dictionary
-        # append this isomorphic dictionary mapping to the list and return
-        if reduce(lambda x, y: x and y, [x in mapDict.keys() for x in subgraph.nodes()]):       
-            isomorphs.append(mapDict)
-            return isomorphs
+        # generate a copy of this isomorphic dictionary mapping
+        if len(mapping) == len(query.nodes):
+            yield dict(mapping)
+            return
+        
+        stack = [self._extensionCandidates(mapping, used, host, query, conditions, symbreak)]
+        while stack:
+            constrainedNeighbor, candidates = stack[-1]
+            # Backtrack the candidate tried last at this depth
+            if constrainedNeighbor in mapping:
+                used.discard(mapping.pop(constrainedNeighbor))
+            rangeneighbors = next(candidates, _exhausted)
+            if rangeneighbors is _exhausted:
+                stack.pop()
+                continue
+            mapping[constrainedNeighbor] = rangeneighbors
+            used.add(rangeneighbors)
+            if len(mapping) == len(query.nodes):
+                yield dict(mapping)
+            else:
+                stack.append(self._extensionCandidates(mapping, used, host, query, conditions, symbreak))
+    
+    def _extensionCandidates(self, mapping, used, host, query, conditions, symbreak):
+        # Picks the next query node to map and returns it with an iterator over the graph nodes that extend
+        # mapping with it.  The iterator checks each graph node against mapping when it is reached.
+        subgraph = query.graph
         
         # Look for candidates that have neighbors in the domain
         constrainedNeighbor = 0
-        candidates = []
-        candList = [x for x in subgraph.nodes() if x not in mapDict.keys()]
-        for candidate in candList:
-            for neighbor in subgraph.neighbors(candidate):
-                if neighbor in mapDict.keys():
-                    candidates.append(candidate)
-                    break
+        candList = [x for x in query.nodes if x not in mapping]
+        candidates = [x for x in candList if any(neighbor in mapping for neighbor in subgraph.adj[x])]
         if len(candidates) > 1:
-            #Sort by degree then largest neighborhood degree sequence
-            candidates = sorted(candidates,
-                                cmp=lambda x,y: subgraph.degree(x) - subgraph.degree(y),
-                                reverse=True)
-            '''candidates = sorted(candidates,
-                                cmp=lambda x,y:sum([subgraph.degree(i) for i in subgraph.neighbors(x)]) - 
-                                sum([subgraph.degree(j) for j in subgraph.neighbors(y)]),
-                                reverse=True)'''
+            #Sort by degree
+            candidates = sorted(candidates, key=query.degree.__getitem__, reverse=True)
         if candidates == []:
-            neighbors = []
-            [neighbors.extend(x) for x in [subgraph.neighbors(y) for y in mapDict.keys()]]
-            neighbors = set(neighbors) - set(mapDict.keys())
+            neighbors = set(neighbor for x in mapping for neighbor in subgraph.adj[x]) - set(mapping)
             constrainedNeighbor = list(neighbors)[0] if len(neighbors) > 0 else random.choice(candList)
         else:       
             constrainedNeighbor = candidates[0]
         
-        # Identify all neighbors in the range
-        neighbors = []
-        # Find all the Graph neighbors of the current range of mapDict
-        [neighbors.extend(x) for x in [Graph.neighbors(y) for y in mapDict.values()]]
-        if Graph.is_directed():
-            [neighbors.append(x) for x in Graph.nodes() for y in mapDict.values() if y in Graph.edge[x]]
+        # Find all the Graph neighbors of the current range of mapping
+        neighbors = set(x for y in used for x in host.neighbors(y))
+        if host.directed:
+            neighbors.update(x for y in used for x in host.predecessors(y))
         # Don't consider the neighbors that already exist in the range
-        neighbors = set(neighbors) - set(mapDict.values())
-        if ( (len(neighbors) < 1 and len(Graph.nodes()) > len(mapDict.values())) or
-             0 in subgraph.degree().values()):
-            neighbors = set(Graph.nodes()) - set(mapDict.values())
-            #print "Fixed!"
+        neighbors -= used
+        if (len(neighbors) < 1 and host.size > len(used)) or query.isolated:
+            neighbors = set(host.nodes()) - used
         
-        issue = False
-        for rangeneighbors in neighbors:
-            # Skip candidate if the degree of the node in the graph is less than the degree of the node in the subgraph or
-            # if the states are incompatable
-            stateTest = False if not self.state else Graph.node[rangeneighbors][self.state] != subgraph.node[constrainedNeighbor][self.state]
-            degreeTest = (Graph.in_degree(rangeneighbors) < subgraph.in_degree(constrainedNeighbor) and 
-                                          Graph.out_degree(rangeneighbors) < subgraph.out_degree(constrainedNeighbor)) if Graph.is_directed() else (Graph.degree(rangeneighbors) < subgraph.degree(constrainedNeighbor))            
-            if degreeTest or stateTest:
-                continue
-            
-            for key in mapDict.keys():
-                if not (subgraph.has_edge(constrainedNeighbor, key) == Graph.has_edge(rangeneighbors, mapDict[key]) and 
-                    subgraph.has_edge(key, constrainedNeighbor) == Graph.has_edge(mapDict[key], rangeneighbors)):
-                    issue = True
-            
-            for key in mapDict.keys():
-                if (subgraph.has_edge(constrainedNeighbor, key) and Graph.has_edge(rangeneighbors, mapDict[key]) and
-                    subgraph.edge[constrainedNeighbor][key] != Graph.edge[rangeneighbors][mapDict[key]]) or \
-                   (subgraph.has_edge(key, constrainedNeighbor) and Graph.has_edge(mapDict[key], rangeneighbors) and
-                    subgraph.edge[key][constrainedNeighbor] != Graph.edge[mapDict[key]][rangeneighbors]):
-                    issue = True
-                    
-            if symbreak:
-                # Apply symmetry breaking conditions
-                breaking = [x for x in conditions if constrainedNeighbor in x]
-                for condition in breaking:
-                    if constrainedNeighbor == condition[0] and condition[1] in mapDict:
-                        issue = True if rangeneighbors > mapDict[condition[1]] else issue
-                    elif constrainedNeighbor == condition[1] and condition[0] in mapDict:
-                        issue = True if mapDict[condition[0]] > rangeneighbors else issue
-                        
-            # Skip candidate if any issues were found          
-            if issue:
-                issue = False
-                continue
-            
-            # Create a new map, add the new candidate, recursively call IsomorphicExtensions
-            newMap = copy.deepcopy(mapDict)
-            newMap[constrainedNeighbor] = rangeneighbors
-            isomorphs.extend(self.isomorphicExtensions(newMap, Graph, subgraph,conditions, symbreak))
+        breaking = [x for x in conditions if constrainedNeighbor in x] if symbreak else []
+        return constrainedNeighbor, itertools.ifilter(
+            lambda rangeneighbors: self._extends(mapping, host, query, constrainedNeighbor, rangeneighbors, breaking),
+            neighbors)
+    
+    def _extends(self, mapping, host, query, constrainedNeighbor, rangeneighbors, breaking):
+        # Whether mapping constrainedNeighbor to rangeneighbors is consistent with mapping
+        subgraph = query.graph
+        Graph = host.graph
+        # Skip candidate if the degree of the node in the graph is less than the degree of the node in the subgraph or
+        # if the states are incompatable
+        stateTest = False if not self.state else Graph.node[rangeneighbors][self.state] != subgraph.node[constrainedNeighbor][self.state]
+        if not host.fits(rangeneighbors, query, constrainedNeighbor) or stateTest:
+            return False
         
-        # return a list of the isomorphs (also remove empty lists)
-        return [x for x in isomorphs if x]    
+        queryAdj = subgraph.adj
+        queryPred = subgraph.pred if host.directed else queryAdj
+        graphAdj = Graph.adj
+        graphPred = Graph.pred if host.directed else graphAdj
+        for key, value in mapping.iteritems():
+            # Both graphs must have the same edges, with the same data, between the new node and the mapped nodes
+            if (key in queryAdj[constrainedNeighbor]) != (value in graphAdj[rangeneighbors]) or \
+               (key in queryPred[constrainedNeighbor]) != (value in graphPred[rangeneighbors]):
+                return False
+            if (key in queryAdj[constrainedNeighbor] and
+                queryAdj[constrainedNeighbor][key] != graphAdj[rangeneighbors][value]) or \
+               (key in queryPred[constrainedNeighbor] and
+                queryPred[constrainedNeighbor][key] != graphPred[rangeneighbors][value]):
+                return False
+        
+        # Apply symmetry breaking conditions
+        for condition in breaking:
+            if constrainedNeighbor == condition[0] and condition[1] in mapping:
+                if rangeneighbors > mapping[condition[1]]:
+                    return False
+            elif constrainedNeighbor == condition[1] and condition[0] in mapping:
+                if mapping[condition[0]] > rangeneighbors:
+                    return False
+        return True
     
     def lexicographicallySmallestLabeling(self, graph):
         automorphs = self.findSubgraphInstances(graph, graph, False)
@@ -274,7 +460,9 @@ class utility(object):
 
 
     def isIsomorphic(self, G1, G2,returnList=False):
-            """Fuction that determines if the two graphs passed in are isomorphic
+            """Fuction that determines if the two graphs passed in are isomorphic, comparing the
+            node data but not the edge data.  The graphs are compared through their canonical
+            certificates.
     
             Parameters
             ----------
@@ -283,78 +471,23 @@ class utility(object):
              
             G2 : networkx Graph()
              - Second graph
+             
+            returnList : boolean
+             - If True the mapping is returned instead of a boolean
     
             Returns
             -------
             Boolean : True if graphs are isomorphic, False otherwise
-            """
-            mappingList = []
-            # Check local properties
-            d1=list(G1.degree().values())
-            d1.sort()
-            d2=list(G2.degree().values())
-            d2.sort()
-            if not returnList:
-                if d1 != d2: return False
-            else:
-                if d1 != d2: return mappingList
-            
-            isomorphic = True
-            permutations = list(itertools.permutations(G1.nodes()))
-            while len(permutations) > 0:
-                permute = random.choice(permutations)
-                isomorphic = True
-                # Check nodes
-                for index in range(0,len(permute)):
-                    if G1.node[permute[index]] != G2.node[G2.nodes()[index]]:
-                        isomorphic = False
-                    if not isomorphic: break
-                    
-                if isomorphic:
-                    # Check edges
-                    for index in range(0,len(permute)):
-                        
-                        # If no edge exists for this index in both graphs skip this index
-                        if permute[index] not in G1.edge and G2.nodes()[index] not in G2.edge:
-                            continue
-                        
-                        # Check for the failure case
-                        if (permute[index] in G1.edge and G2.nodes()[index] not in G2.edge) or \
-                           (permute[index] not in G1.edge and G2.nodes()[index] in G2.edge):
-                            isomorphic = False
-                            break
-                        # The edge key exists in both dictionaries, now search all edges for this key
-                        else: 
-                            # Check one direction
-                            for node in G1.edge[permute[index]]:
-                                edgeIndex = permute.index(node)
-                                if G2.nodes()[edgeIndex] not in G2.edge[G2.nodes()[index]]:
-                                    isomorphic = False
-                                    break
-                                
-                            # Check other direction
-                            for node in G2.edge[G2.nodes()[index]]:
-                                edgeIndex = G2.nodes().index(node)
-                                if permute[edgeIndex] not in G1.edge[permute[index]]:
-                                    isomorphic = False
-                                    break
-                            # Break out of the index for loop 
-                            if not isomorphic: break
-                                                  
-                if isomorphic:
-                    mappingList = permute
-                    break
-                
-                permutations.remove(permute)
             
-            if not returnList:
-                if not isomorphic: return False
-                else: return True
-            else:
-                return mappingList    
+            If returnList is True, a tuple holding the node of G1 that maps to each node of G2, in
+            the order of G2.nodes(), or [] if the graphs are not isomorphic
+            """
+            return self._compareCertificates(G1, G2, returnList, False)
             
     def isIsomorphicFast(self, G1, G2,returnList=False):
-            """Fuction that determines if the two graphs passed in are isomorphic
+            """Fuction that determines if the two graphs passed in are isomorphic, comparing both
+            the node data and the edge data.  The graphs are compared through their canonical
+            certificates.
     
             Parameters
             ----------
@@ -363,78 +496,78 @@ class utility(object):
              
             G2 : networkx Graph()
              - Second graph
+             
+            returnList : boolean
+             - If True the mapping is returned instead of a boolean
     
             Returns
             -------
             Boolean : True if graphs are isomorphic, False otherwise
+            
+            If returnList is True, a tuple holding the node of G1 that maps to each node of G2, in
+            the order of G2.nodes(), or [] if the graphs are not isomorphic
             """
+            return self._compareCertificates(G1, G2, returnList, True)
+    
+    def _compareCertificates(self, G1, G2, returnList, edgeData):
             mappingList = []
             # Check local properties
             d1=list(G1.degree().values())
             d1.sort()
             d2=list(G2.degree().values())
             d2.sort()
+            if d1 != d2:
+                return mappingList if returnList else False
+            
+            certificate1, order1 = self.canonicalLabeling(G1, edgeData)
+            certificate2, order2 = self.canonicalLabeling(G2, edgeData)
+            if certificate1 != certificate2:
+                return mappingList if returnList else False
             if not returnList:
-                if d1 != d2: return False
-            else:
-                if d1 != d2: return mappingList
+                return True
+            # Nodes at the same position of the canonical orders map to each other
+            position = dict((node, index) for index, node in enumerate(order2))
+            return tuple(order1[position[node]] for node in G2.nodes())
+    
+    def canonicalLabeling(self, G, edgeData=True):
+            """Computes a canonical labeling of a small graph with node data, and optionally edge
+            data, by colour refinement and individualisation.  Two graphs are isomorphic, with
+            equal node data (and edge data), if and only if their certificates are equal.
+    
+            Parameters
+            ----------
+            G : networkx Graph() or DiGraph()
+             - Graph to label, its node and edge data must be hashable
+             
+            edgeData : boolean
+             - If True (default) the edge data is part of the certificate
+    
+            Returns
+            -------
+            certificate : hashable tuple
             
-            isomorphic = True
-            permutations = list(itertools.permutations(G1.nodes()))
-            G2Nodes = G2.nodes()
-            while len(permutations) > 0:
-                permute = random.choice(permutations)
-                isomorphic = True
-                # Check nodes
-                for index in range(0,len(permute)):
-                    if G1.node[permute[index]] != G2.node[G2Nodes[index]]:
-                        isomorphic = False
-                    if not isomorphic: break
-                    
-                if isomorphic:
-                    # Check edges
-                    for index in range(0,len(permute)):
-                        # If no edge exists for this index in both graphs skip this index
-                        if permute[index] not in G1.edge and G2Nodes[index] not in G2.edge:
-                            continue
-                        
-                        # Check for the failure case
-                        if (permute[index] in G1.edge and G2Nodes[index] not in G2.edge) or \
-                           (permute[index] not in G1.edge and G2Nodes[index] in G2.edge):
-                            isomorphic = False
-                            break
-                        # The edge key exists in both dictionaries, now search all edges for this key
-                        else: 
-                            # Check one direction
-                            for node in G1.edge[permute[index]]:
-                                edgeIndex = permute.index(node)
-                                if G2Nodes[edgeIndex] not in G2.edge[G2Nodes[index]] or \
-                                   G1.edge[permute[index]][node] != G2.edge[G2Nodes[index]][G2Nodes[edgeIndex]]:
-                                    isomorphic = False
-                                    break
-                                
-                            # Check other direction
-                            for node in G2.edge[G2Nodes[index]]:
-                                edgeIndex = G2Nodes.index(node)
-                                if permute[edgeIndex] not in G1.edge[permute[index]] or \
-                                   G1.edge[permute[index]][permute[edgeIndex]] != G2.edge[G2Nodes[index]][node]:
-                                    isomorphic = False
-                                    break
-                                                                                  
-                            # Break out of the index for loop 
-                            if not isomorphic: break
-                                                  
-                if isomorphic:
-                    mappingList = permute
-                    break
-                
-                permutations.remove(permute)
+            order : list
+             - The nodes of G in canonical order
             
-            if not returnList:
-                if not isomorphic: return False
-                else: return True
-            else:
-                return mappingList   
+            Example
+            -------
+            
+            >>>classes = {}
+            >>>classes.setdefault(util.canonicalLabeling(subgraph)[0], []).append(subgraph)
+            """
+            return _canonicalLabeling(G, edgeData)
+    
+    def canonicalCertificate(self, G, edgeData=True):
+            """Returns the certificate of canonicalLabeling(G, edgeData)."""
+            return _canonicalLabeling(G, edgeData)[0]
+    
+    def isomorphismInvariant(self, G):
+            """Returns a cheap hashable invariant of G: the node and edge counts, the degree sequence
+            and the multiset of node data.  Graphs that isIsomorphic finds isomorphic have equal
+            invariants, so it can key buckets of graphs that only need isIsomorphic within a bucket.
+            """
+            return (G.is_directed(), len(G), G.number_of_edges(), tuple(sorted(G.degree().itervalues())),
+                    tuple(sorted(tuple(sorted(data.iteritems())) for data in G.node.itervalues())))
             
 if __name__ == "__main__":
     import graphMLRead
@@ -0,0 +1,324 @@
+'''
+Columnar binary storage for lists of networkx graphs.  A list of frames is stored as
+flat NumPy arrays: the node ids and edge end points of all frames are concatenated and
+indexed by per frame offsets, and every node or edge attribute is stored as a column
+holding the values of the rows that have the attribute, the position of each of these
+rows within its frame and per frame offsets into the values.  String attributes (such
+as the compressState tags of compressed frames) are stored as integer codes into a
+vocabulary.  Reading a single frame back only touches the slices of the arrays that
+belong to it.
+
+An archive is either a single NumPy .npz file, which is read into memory, or a
+directory holding one raw binary file per array, which is memory-mapped so that
+datasets larger than the available memory can be used.  Frames are encoded one at a
+time, so a mapped archive can be written from a stream of frames.
+'''
+import os
+import json
+import numpy
+
+FORMAT_VERSION = 1
+HEADER_FILE = 'header.json'
+
+_dtypes = {'int': numpy.int64, 'float': numpy.float64, 'bool': numpy.bool_,
+           'str': numpy.int32, 'unicode': numpy.int32}
+
+def _text(value):
+    # json hands back unicode, while the GraphML reader gives str attribute names
+    try:
+        return str(value)
+    except UnicodeEncodeError:
+        return value
+
+def _kind(name, valueType):
+    if valueType is bool:
+        return 'bool'
+    if valueType in (int, long):
+        return 'int'
+    if valueType is float:
+        return 'float'
+    if valueType is str:
+        return 'str'
+    if valueType is unicode:
+        return 'unicode'
+    raise ValueError("Attribute '%s' holds a value of type %s, which cannot be stored" % (name, valueType.__name__))
+
+class _MemorySink(object):
+    """ Collects the arrays of an archive in memory. """
+    def __init__(self):
+        self.chunks = {}
+
+    def append(self, name, values, dtype):
+        self.chunks.setdefault(name, []).append(numpy.asarray(values, dtype=dtype))
+
+    def arrays(self):
+        return dict((name, numpy.concatenate(chunks)) for name, chunks in self.chunks.iteritems())
+
+class _FileSink(object):
+    """ Appends the arrays of an archive to raw binary files in a directory. """
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+        self.layout = {}
+
+    def append(self, name, values, dtype):
+        if name not in self.files:
+            self.files[name] = open(os.path.join(self.directory, name + '.bin'), 'wb')
+            self.layout[name] = [numpy.dtype(dtype).str, 0]
+        values = numpy.asarray(values, dtype=dtype)
+        values.tofile(self.files[name])
+        self.layout[name][1] += len(values)
+
+    def close(self):
+        for f in self.files.itervalues():
+            f.close()
+
+class _ColumnWriter(object):
+    def __init__(self, sink, prefix, index, key, kind, frames):
+        self.sink = sink
+        self.index = index
+        self.column = '%s%d' % (prefix, index)
+        self.key = key
+        self.kind = kind
+        self.vocabulary = [] if kind in ('str', 'unicode') else None
+        self.codes = {}
+        self.count = 0
+        # Frames written before the column first appeared hold no values
+        self.sink.append(self.column + '.offsets', [0] * (frames + 1), numpy.int64)
+
+    def add(self, rows, values):
+        if self.vocabulary is not None:
+            for value in values:
+                if value not in self.codes:
+                    self.codes[value] = len(self.vocabulary)
+                    self.vocabulary.append(value)
+            values = [self.codes[value] for value in values]
+        self.sink.append(self.column + '.rows', rows, numpy.int32)
+        self.sink.append(self.column + '.values', values, _dtypes[self.kind])
+        self.count += len(rows)
+
+    def endFrame(self):
+        self.sink.append(self.column + '.offsets', [self.count], numpy.int64)
+
+class _AttributeWriter(object):
+    """ Writes the attribute columns of the nodes (or edges) of a list of frames. """
+    def __init__(self, sink, prefix):
+        self.sink = sink
+        self.prefix = prefix
+        self.columns = {}
+        self.frames = 0
+
+    def addFrame(self, rows):
+        """ rows is the list of the attribute dicts of the nodes (or edges) of one frame. """
+        values = {}
+        for row, data in enumerate(rows):
+            for key, value in data.iteritems():
+                if key not in values:
+                    values[key] = ([], [])
+                values[key][0].append(row)
+                values[key][1].append(value)
+        for key, (present, columnValues) in values.iteritems():
+            if key not in self.columns:
+                self.columns[key] = _ColumnWriter(self.sink, self.prefix, len(self.columns), key,
+                                                  _kind(key, type(columnValues[0])), self.frames)
+            column = self.columns[key]
+            for kind in set(_kind(key, valueType) for valueType in set(map(type, columnValues))):
+                if kind != column.kind:
+                    if set([kind, column.kind]) == set(['str', 'unicode']):
+                        column.kind = 'unicode'
+                    else:
+                        raise ValueError("Attribute '%s' mixes values of kind %s and %s, which cannot be stored"
+                                         % (key, column.kind, kind))
+            column.add(present, columnValues)
+        for column in self.columns.itervalues():
+            column.endFrame()
+        self.frames += 1
+
+    def header(self):
+        return [[column.key, column.kind, column.vocabulary]
+                for column in sorted(self.columns.itervalues(), key=lambda column: column.index)]
+
+class FrameSetWriter(object):
+    """Encodes a list of graphs, one frame at a time, into arrays under the name prefix.
+
+    Parameters
+    ----------
+    sink : array sink
+       _MemorySink or _FileSink receiving the arrays
+
+    name : string
+       Prefix of the array names, e.g. 'input' or 'compressed'
+    """
+    def __init__(self, sink, name):
+        self.sink = sink
+        self.name = name
+        self.directed = []
+        self.graphs = []
+        self.nodeCount = 0
+        self.edgeCount = 0
+        self.nodeAttributes = _AttributeWriter(sink, name + '.node')
+        self.edgeAttributes = _AttributeWriter(sink, name + '.edge')
+        sink.append(name + '.nodeOffsets', [0], numpy.int64)
+        sink.append(name + '.edgeOffsets', [0], numpy.int64)
+
+    def addFrame(self, frame):
+        if frame.is_multigraph():
+            raise ValueError('Multigraph frames cannot be stored')
+        self.directed.append(frame.is_directed())
+        self.graphs.append(dict(frame.graph))
+        nodes = frame.node.keys()
+        if any(type(node) not in (int, long) for node in nodes):
+            raise ValueError('Only frames with integer node ids can be stored')
+        edges = list(frame.edges_iter(data=True))
+        self.nodeCount += len(nodes)
+        self.edgeCount += len(edges)
+        self.sink.append(self.name + '.nodeIds', nodes, numpy.int64)
+        self.sink.append(self.name + '.nodeOffsets', [self.nodeCount], numpy.int64)
+        self.sink.append(self.name + '.edgeSources', [edge[0] for edge in edges], numpy.int64)
+        self.sink.append(self.name + '.edgeTargets', [edge[1] for edge in edges], numpy.int64)
+        self.sink.append(self.name + '.edgeOffsets', [self.edgeCount], numpy.int64)
+        self.nodeAttributes.addFrame([frame.node[node] for node in nodes])
+        self.edgeAttributes.addFrame([edge[2] for edge in edges])
+
+    def header(self):
+        """ Returns the JSON serializable description of the frames needed to decode the arrays. """
+        return {'directed': self.directed,
+                'graphs': self.graphs,
+                'nodeColumns': self.nodeAttributes.header(),
+                'edgeColumns': self.edgeAttributes.header()}
+
+def _decode_attributes(prefix, columns, arrays, index, rows):
+    decoded = [{} for row in xrange(rows)]
+    for column_index, (key, kind, vocabulary) in enumerate(columns):
+        column = '%s%d' % (prefix, column_index)
+        start, end = arrays[column + '.offsets'][index:index+2].tolist()
+        values = arrays[column + '.values'][start:end].tolist()
+        if vocabulary is not None:
+            values = [vocabulary[code] for code in values]
+        for row, value in zip(arrays[column + '.rows'][start:end].tolist(), values):
+            decoded[row][key] = value
+    return decoded
+
+def decode_frame(arrays, header, name, index):
+    """Decodes one frame stored with FrameSetWriter.
+
+    Returns
+    -------
+    (directed, graph, node, edges) : tuple
+       Whether the frame is directed, its graph attribute dict, a dict mapping node ids to their
+       attribute dicts and a list of (start, end, attribute dict) edges.
+    """
+    start, end = arrays[name + '.nodeOffsets'][index:index+2].tolist()
+    ids = arrays[name + '.nodeIds'][start:end].tolist()
+    node = dict(zip(ids, _decode_attributes(name + '.node', header['nodeColumns'], arrays, index, end - start)))
+    start, end = arrays[name + '.edgeOffsets'][index:index+2].tolist()
+    edges = zip(arrays[name + '.edgeSources'][start:end].tolist(),
+                arrays[name + '.edgeTargets'][start:end].tolist(),
+                _decode_attributes(name + '.edge', header['edgeColumns'], arrays, index, end - start))
+    return header['directed'][index], dict(header['graphs'][index]), node, edges
+
+def _write_frame_sets(sink, frame_sets):
+    writers = [FrameSetWriter(sink, name) for name, frames in frame_sets]
+    for frames in _zip_frames([frames for name, frames in frame_sets]):
+        for writer, frame in zip(writers, frames):
+            if frame is not None:
+                writer.addFrame(frame)
+    return dict((writer.name, writer.header()) for writer in writers)
+
+def _zip_frames(frame_lists):
+    # Walks the lists of frames side by side, so generators are consumed one frame at a time
+    iterators = [iter(frames) for frames in frame_lists]
+    while True:
+        frames = [next(iterator, None) for iterator in iterators]
+        if all(frame is None for frame in frames):
+            return
+        yield frames
+
+def write_archive(path, frame_sets, state_name=None, mapped=False, metadata=None):
+    """Writes lists of graphs to a frame archive.
+
+    Parameters
+    ----------
+    path : string path
+       File name of the .npz archive, or the directory of a mapped archive
+
+    frame_sets : list of (name, frames) tuples
+       Each name, e.g. 'input', with an iterable of networkx graphs.  The iterables are consumed in
+       step, one frame at a time.
+
+    state_name : string or None
+       Name of the node state used in the frames
+
+    mapped : boolean
+       If True the arrays are written as raw binary files to the directory path, which read_archive
+       memory-maps.  Otherwise a single uncompressed NumPy .npz file is written.
+
+    metadata : dict or None
+       JSON serializable data stored with the frames, such as results derived from them
+
+    Returns
+    -------
+    void
+    """
+    header = {'version': FORMAT_VERSION, 'stateName': state_name, 'metadata': metadata or {}}
+    if mapped:
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        sink = _FileSink(path)
+        try:
+            header['sets'] = _write_frame_sets(sink, frame_sets)
+        finally:
+            sink.close()
+        header['arrays'] = sink.layout
+        with open(os.path.join(path, HEADER_FILE), 'w') as f:
+            json.dump(header, f)
+    else:
+        sink = _MemorySink()
+        header['sets'] = _write_frame_sets(sink, frame_sets)
+        arrays = sink.arrays()
+        arrays['header'] = numpy.array(json.dumps(header))
+        with open(path, 'wb') as f:
+            numpy.savez(f, **arrays)
+
+def read_archive(path):
+    """Reads an archive written by write_archive.  The arrays of a mapped archive (a directory) are
+    memory-mapped read-only; those of an .npz archive are read into memory.
+
+    Returns
+    -------
+    (arrays, header) : tuple
+       A dict of the stored arrays and the decoded header.  header['sets'] maps the name of each
+       list of frames to the description decode_frame needs, header['metadata'] is the metadata passed
+       to write_archive ({} for archives written without it).
+    """
+    if os.path.isdir(path):
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            header = json.load(f)
+        arrays = {}
+        for name, (dtype, length) in header['arrays'].iteritems():
+            if length > 0:
+                arrays[_text(name)] = numpy.memmap(os.path.join(path, name + '.bin'), dtype=numpy.dtype(_text(dtype)),
+                                                   mode='r', shape=(length,))
+            else:
+                # Empty files cannot be mapped
+                arrays[_text(name)] = numpy.zeros(0, dtype=numpy.dtype(_text(dtype)))
+    else:
+        archive = numpy.load(path)
+        try:
+            arrays = dict((name, archive[name]) for name in archive.files)
+        finally:
+            archive.close()
+        header = json.loads(arrays.pop('header').item())
+    if header['version'] != FORMAT_VERSION:
+        raise ValueError('Unsupported frame archive version: ' + str(header['version']))
+    header.setdefault('metadata', {})
+    for description in header['sets'].itervalues():
+        for columns in (description['nodeColumns'], description['edgeColumns']):
+            for column in columns:
+                column[0] = _text(column[0])
+                if column[1] == 'str':
+                    column[2] = [_text(value) for value in column[2]]
+        description['graphs'] = [dict((_text(key), _text(value) if isinstance(value, unicode) else value)
+                                      for key, value in graph.iteritems())
+                                 for graph in description['graphs']]
+    return arrays, header
@@ -6,7 +6,7 @@ __author__ = """\n""".join(['Jeffrey Schmidt (jschmid1@binghamton.edu',
                             'Benjamin Bush (benjaminjamesbush@gmail.com)',
                             'Hiroki Sayama (sayama@binghamton.edu)'])
 
-__all__ = ['openGraphMLNetwork','runGNA','addGraphToReproducedInput', 'addUserExtractions','addDefaultModels',
+__all__ = ['openGraphMLNetwork','openFrameArchive','runGNA','addGraphToReproducedInput', 'addUserExtractions','addDefaultModels',
            'initializeRewritingData','findExtractionMechanism']
 
 
@@ -87,7 +87,7 @@ class gna:
         for model in super(type(userObject),userObject).getModels():
             self.addModel(model)
          
-    def openGraphMLNetwork(self, path):
+    def openGraphMLNetwork(self, path, stream=False, checkpointInterval=0):
         """Reads a graphML file and stores the data in a list of networkx graph objects.
 
         Parameters
@@ -95,26 +95,60 @@ class gna:
         path : string path
            Path to the graphml file
 
+        stream : boolean
+           If True the frames are compressed while they are read and only the compressed frames
+           and the full snapshot checkpoints are kept in memory.
+
+        checkpointInterval : integer
+           Number of frames between full snapshot checkpoints.  When stream is True, 0 (default)
+           only keeps the first and last frames; otherwise 0 keeps every frame as a full snapshot.
+
         Returns
         -------
         void
         """
-        print "Reading file...",
-        self.networkFrames.readGraphML(path)
-        #self.networkFrames.setInputNetwork([self.networkFrames.inputFrames[index] for index in range(9)])
-        self.networkFrames.setInputNetwork(self.networkFrames.inputFrames)
-        print "Done"
-        print "Analyzing dynamics...",
-        self.networkFrames.compressNetworkFrames()
+        if stream:
+            print "Reading and analyzing dynamics...",
+            self.networkFrames.ingestGraphML(path, checkpointInterval)
+            print "Done."
+        else:
+            print "Reading file...",
+            self.networkFrames.readGraphML(path)
+            #self.networkFrames.setInputNetwork([self.networkFrames.inputFrames[index] for index in range(9)])
+            self.networkFrames.setInputNetwork(self.networkFrames.inputFrames)
+            print "Done"
+            print "Analyzing dynamics...",
+            self.networkFrames.compressNetworkFrames()
+            if checkpointInterval > 0:
+                self.networkFrames.setCheckpointInterval(checkpointInterval)
+            print "Done."
+        self.extraction.setNetworkFrames(self.networkFrames)
+        self.motifExtraction.setNetworkFrames(self.networkFrames)
+
+    def openFrameArchive(self, path):
+        """Reads a binary frame archive written by NetworkFrames.saveFrames or NetworkFrames.convertGraphML.
+
+        Parameters
+        ----------
+        path : string path
+           Path to the archive
+
+        Returns
+        -------
+        void
+        """
+        print "Reading archive...",
+        self.networkFrames.loadFrames(path)
         print "Done."
         self.extraction.setNetworkFrames(self.networkFrames)
         self.motifExtraction.setNetworkFrames(self.networkFrames)
 
-    def findExtractionMechanism(self):
+    def findExtractionMechanism(self, workers=None):
         """ Identify the Extraction mechanism in the input data.
         Parameters
         ----------
-        none
+        workers : integer
+           Number of worker processes used to score the models, see Extraction.identifyExtractionDynamics.
 
         Returns
         -------
@@ -123,7 +157,7 @@ class gna:
         
         self.extraction.setModels(self.models.getModelList())
         self.extraction.generateExtractionSubgraphs()
-        self.extraction.identifyExtractionDynamics()
+        self.extraction.identifyExtractionDynamics(workers)
 
     def initializeRewritingData(self):
         """ Initialize the Rewriting data structures.
@@ -5,6 +5,66 @@ only returns the first element in the graph list that is returned by the
 graphMLReader class.
 '''
 import networkx.readwrite.graphml as ml
+from StringIO import StringIO
+try:
+    from xml.etree.cElementTree import iterparse
+except ImportError:
+    from xml.etree.ElementTree import iterparse
+
+class StreamingGraphMLReader(ml.GraphMLReader):
+    """GraphMLReader that parses the file incrementally with iterparse and
+    yields each top level <graph> as soon as its closing tag is read.  The
+    XML for a graph is discarded once the graph has been built, so only one
+    frame is held in memory at a time.
+    """
+    def __call__(self, path=None, string=None):
+        if path is not None:
+            source = path
+        elif string is not None:
+            source = StringIO(string)
+        else:
+            raise ValueError("Must specify either 'path' or 'string' as kwarg.")
+        graphTag = "{%s}graph" % self.NS_GRAPHML
+        keys = None
+        defaults = None
+        root = None
+        depth = 0
+        for event, element in iterparse(source, events=('start', 'end')):
+            if root is None:
+                root = element
+            if element.tag != graphTag:
+                continue
+            if event == 'start':
+                # The <key> elements precede the first graph, so they have
+                # all been parsed by the time we get here.
+                if keys is None:
+                    (keys, defaults) = self.find_graphml_keys(root)
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    yield self.make_graph(element, keys, defaults)
+                    root.clear()
+
+def iter_graphml(path,node_type=int):
+    """Lazily read the graphs of a multi-graph GraphML file.
+
+    Parameters
+    ----------
+    path : file or string
+       File or filename to read.
+
+    node_type: Python type (default: int)
+       Convert node ids to this type
+
+    Returns
+    -------
+    generator(graphs): Generator of NetworkX graphs in file order
+        If no parallel edges are found a Graph or DiGraph is returned.
+        Otherwise a MultiGraph or MultiDiGraph is returned.
+    """
+    reader = StreamingGraphMLReader(node_type=node_type)
+    return reader(path)
 
 def read_graphml(path,node_type=str):
     """Read graph in GraphML format from path.
@@ -26,8 +86,7 @@ def read_graphml(path,node_type=str):
         
     """
     # **Deprecated **  fh=ml._get_fh(path,mode='rb')
-    reader = ml.GraphMLReader(node_type=int)
     # need to check for multiple graphs
-    glist=list(reader(path))
+    glist=list(iter_graphml(path, node_type=int))
     #return glist[0] <---- The current networkx read_graphml return value
-    return glist # <---- returns the full list of graphs read from a file
\ No newline at end of file
+    return glist # <---- returns the full list of graphs read from a file
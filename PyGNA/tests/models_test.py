@@ -0,0 +1,131 @@
+from PyGNA import NetworkFrames
+from PyGNA import Models
+from PyGNA import Features
+from PyGNA import Extraction
+
+def vectorized_models_test():
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('StateBasedNetwork.graphML')
+    frames.compressNetworkFrames()
+    models = Models.Models()
+    models.addDefaultModelsToList()
+    for index in [1, 10, 100]:
+        subgraph = Extraction.Extraction().getExtractionSubgraphAt(index, frames)
+        features = Features.NodeFeatures(frames.getInputNetworkAt(index-1, False), frames.getStateName())
+        rows = features.getRows(subgraph.nodes())
+        for model in models.getModelList():
+            expected = model.getLikelihoodValue(frames, index)
+            value = model.getLikelihoodValueFromFeatures(features, rows)
+            assert value == expected or abs(value - expected) < 1e-9
+
+def missing_state_test():
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('BarabasiAlbert.graphML')
+    features = Features.NodeFeatures(frames.getInputNetworkAt(0, False), frames.getStateName())
+    try:
+        features.getStateCodes()
+        assert False
+    except KeyError:
+        pass
+    try:
+        features.getRows([-1])
+        assert False
+    except KeyError:
+        pass
+
+def parallel_model_evaluation_test():
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('StateBasedNetwork.graphML')
+    frames.compressNetworkFrames()
+    models = Models.Models()
+    models.addDefaultModelsToList()
+    extraction = Extraction.Extraction()
+    extraction.setNetworkFrames(frames)
+    extraction.setModels(models.getModelList())
+    serial = extraction._scoreFrames(1, len(frames.getInputNetworks()))
+    parallel = extraction._scoreFramesInPool(len(frames.getInputNetworks()), 3)
+    for position in range(len(models.getModelList())):
+        assert (serial[1][position] is None) == (parallel[1][position] is None)
+        assert abs(serial[0][position] - parallel[0][position]) < 1e-6
+
+def incremental_normalizer_test():
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('randBinaryState.graphML')
+    frames.compressNetworkFrames()
+    models = Models.Models()
+    models.addDefaultModelsToList()
+    # Walk the frames in order, then jump back to force a rebuild
+    for model in models.getModelList():
+        for index in range(len(frames.getInputNetworks())) + [3]:
+            G = frames.getInputNetworkAt(index, False)
+            expected = model.getModel()(G, G, frames.getStateName())
+            assert abs(model.normalizer.getValue(frames, index) - expected) < 1e-9 * max(1., abs(expected))
+
+def normalized_scoring_test():
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('randBinaryState.graphML')
+    frames.compressNetworkFrames()
+    scores = []
+    for normalized in [True, False]:
+        models = Models.Models()
+        models.addDefaultModelsToList()
+        if not normalized:
+            for model in models.getModelList():
+                model.normalizer = None
+        extraction = Extraction.Extraction()
+        extraction.setNetworkFrames(frames)
+        extraction.setModels(models.getModelList())
+        scores.append(extraction._scoreFrames(1, len(frames.getInputNetworks())))
+        if normalized:
+            # The degree model walked the frames with its incremental normalizer
+            assert models.getModelList()[0].normalizer.index is not None
+    for position in range(len(scores[0][0])):
+        assert scores[0][1][position] is None and scores[1][1][position] is None
+        assert abs(scores[0][0][position] - scores[1][0][position]) < 1e-6
+
+def feature_cache_test():
+    import networkx as nx
+    frames = NetworkFrames.NetworkFrames()
+    G = nx.Graph()
+    G.add_nodes_from([(1, {'state': 0}), (2, {'state': 1})])
+    G.add_edge(1, 2)
+    features = Features.getNodeFeatures(G, 'state')
+    assert Features.getNodeFeatures(G, 'state') is features
+    change = nx.Graph()
+    change.add_node(3, {NetworkFrames.compressState.tag: NetworkFrames.compressState.added, 'state': 1})
+    frames._decompress(G, change)
+    updated = Features.getNodeFeatures(G, 'state')
+    assert updated is not features
+    assert list(updated.stateCounts) == [1., 2.]
+
+def user_extraction_test():
+    import networkx as nx
+    from PyGNA import UserExtractions
+    class extractions(UserExtractions.UserExtractions):
+        def nodeDegree():
+            return degree
+        def closeness():
+            return cCentrality
+        def sameState():
+            return len([s for s in neighborStates if s == state])
+    user = extractions()
+    user.buildModels()
+    G = nx.path_graph(5)
+    for node in G.nodes():
+        G.node[node]['state'] = node % 2
+    subgraph = G.subgraph([1, 2])
+    closeness = nx.closeness_centrality(G)
+    values = dict((model.getModelName(), model.getModel()(G, subgraph, 'state')) for model in user.getModels())
+    assert values['nodeDegree'] == 4
+    assert abs(values['closeness'] - closeness[1] - closeness[2]) < 1e-9
+    assert values['sameState'] == 0
+    D = nx.DiGraph(G)
+    for model in user.getModels():
+        if model.getModelName() == 'closeness':
+            assert abs(model.getModel()(D, D.subgraph([1]), 'state') - nx.closeness_centrality(D)[1]) < 1e-9
+    try:
+        H = nx.path_graph(3)
+        user.getModels()[0].getModel()(H, H.subgraph([1]), 'state')
+        assert False
+    except KeyError:
+        pass
@@ -61,6 +61,263 @@ def compareOriginalToDecompressed():
         
     assert returnValue
 
+def stream_graphml_test():
+    import networkx.readwrite.graphml as ml
+    for files in os.listdir(os.getcwd()):
+        name, extension = os.path.splitext(files)
+        if extension == '.graphML':
+            streamed = list(testNetworks.iterGraphML(files))
+            original = list(ml.GraphMLReader(node_type=int)(files))
+            assert len(streamed) == len(original)
+            assert compareNetworkFrames(original, streamed)
+    teardown_func()
+
+def ingest_graphml_test():
+    for files in os.listdir(os.getcwd()):
+        name, extension = os.path.splitext(files)
+        if extension == '.graphML':
+            original = NetworkFrames.NetworkFrames()
+            original.readGraphML(files)
+            original.compressNetworkFrames()
+            ingested = NetworkFrames.NetworkFrames()
+            ingested.ingestGraphML(files, checkpointInterval=7)
+            assert ingested.getStateName() == original.getStateName()
+            assert compareNetworkFrames(original._getCompressedNetworks(), ingested._getCompressedNetworks())
+            assert compareNetworkFrames(original.getInputNetworks(), list(ingested.getInputNetworks()))
+            for index in [0, 6, 7, 8, len(original.getInputNetworks())-1]:
+                assert compareNetworkFrames([original.getInputNetworkAt(index)], [ingested.getInputNetworkAt(index)])
+
+def checkpoint_interval_test():
+    original = NetworkFrames.NetworkFrames()
+    original.readGraphML('BarabasiAlbert.graphML')
+    checkpointed = NetworkFrames.NetworkFrames()
+    checkpointed.readGraphML('BarabasiAlbert.graphML')
+    checkpointed.setCheckpointInterval(5)
+    last = len(original.getInputNetworks()) - 1
+    assert checkpointed.checkpointIndices == range(0, last, 5) + [last]
+    assert compareNetworkFrames(original.getInputNetworks(), [checkpointed.getInputNetworkAt(index) for index in range(last+1)])
+    checkpointed.setCheckpointInterval(12)
+    assert checkpointed.checkpointIndices == range(0, last, 12) + [last]
+    assert compareNetworkFrames(original.getInputNetworks(), list(checkpointed.getInputNetworks()))
+    # Frames that are already compressed are not compressed again
+    original.compressNetworkFrames()
+    compressed = original.compressedFrames
+    original.setCheckpointInterval(5)
+    assert original.compressedFrames is compressed
+    assert compareNetworkFrames(checkpointed.getInputNetworks(), list(original.getInputNetworks()))
+
+def checkpointed_add_graph_test():
+    original = NetworkFrames.NetworkFrames()
+    original.readGraphML('BarabasiAlbert.graphML')
+    ingested = NetworkFrames.NetworkFrames()
+    ingested.ingestGraphML('BarabasiAlbert.graphML', 7)
+    frame = original.getInputNetworkAt(len(original.getInputNetworks())-1)
+    for node in range(3):
+        frame.add_edge(-node-1, 0)
+        original.addGraph(frame)
+        ingested.addGraph(frame)
+    last = len(original.getInputNetworks()) - 1
+    assert ingested.checkpointIndices == range(0, last, 7) + [last]
+    assert compareNetworkFrames(original.getInputNetworks(), [ingested.getInputNetworkAt(index) for index in range(last+1)])
+    original.compressNetworkFrames()
+    assert len(ingested.getExtractionSubgraphs()) == len(original.getExtractionSubgraphs())
+
+def parallel_compression_test():
+    for files in os.listdir(os.getcwd()):
+        name, extension = os.path.splitext(files)
+        if extension == '.graphML':
+            serial = NetworkFrames.NetworkFrames()
+            serial.readGraphML(files)
+            serial.compressNetworkFrames()
+            parallel = NetworkFrames.NetworkFrames()
+            parallel.readGraphML(files)
+            parallel.compressNetworkFrames(workers=3)
+            assert len(serial._getCompressedNetworks()) == len(parallel._getCompressedNetworks())
+            assert compareNetworkFrames(serial._getCompressedNetworks(), parallel._getCompressedNetworks())
+            assert [frame.name for frame in serial._getCompressedNetworks()] == [frame.name for frame in parallel._getCompressedNetworks()]
+
+def frame_archive_test():
+    for files in os.listdir(os.getcwd()):
+        name, extension = os.path.splitext(files)
+        if extension == '.graphML':
+            original = NetworkFrames.NetworkFrames()
+            original.readGraphML(files)
+            original.compressNetworkFrames()
+            original.saveFrames('frames.npz')
+            archived = NetworkFrames.NetworkFrames()
+            archived.loadFrames('frames.npz')
+            os.remove('frames.npz')
+            assert archived.getStateName() == original.getStateName()
+            assert len(archived.getInputNetworks()) == len(original.getInputNetworks())
+            assert compareNetworkFrames(original.getInputNetworks(), archived.getInputNetworks())
+            assert compareNetworkFrames(original._getCompressedNetworks(), archived._getCompressedNetworks())
+            assert [frame.name for frame in original._getCompressedNetworks()] == [frame.name for frame in archived._getCompressedNetworks()]
+            assert compareNetworkFrames(original.getExtractionSubgraphs(), archived.getExtractionSubgraphs())
+
+def archived_add_graph_test():
+    original = NetworkFrames.NetworkFrames()
+    original.readGraphML('digraph.graphML')
+    original.compressNetworkFrames()
+    original.saveFrames('frames.npz')
+    archived = NetworkFrames.NetworkFrames()
+    archived.loadFrames('frames.npz')
+    os.remove('frames.npz')
+    assert archived.compressedFrameKey == original.compressedFrameKey
+    classes = archived.getExtractionClasses()
+    frame = original.getInputNetworkAt(len(original.getInputNetworks())-1)
+    frame.add_edge(-1, -2)
+    original.addGraph(frame)
+    archived.addGraph(frame)
+    assert compareNetworkFrames(original.getInputNetworks(), archived.getInputNetworks())
+    archived._addCompressedFrame(original._getCompressedNetworkAt(1, False))
+    assert len(archived.extractionSubgraphs) == len(classes) + 1
+    assert archived.getExtractionClasses()[:len(classes)] == classes
+
+def mapped_frame_archive_test():
+    import shutil
+    import tempfile
+    directory = tempfile.mkdtemp()
+    try:
+        original = NetworkFrames.NetworkFrames()
+        original.readGraphML('digraph.graphML')
+        original.compressNetworkFrames()
+        mapped = NetworkFrames.NetworkFrames()
+        mapped.convertGraphML('digraph.graphML', os.path.join(directory, 'digraph.frames'), mapped=True)
+        assert mapped.getStateName() == original.getStateName()
+        assert compareNetworkFrames(original.getInputNetworks(), mapped.getInputNetworks())
+        assert compareNetworkFrames(original._getCompressedNetworks(), mapped._getCompressedNetworks())
+        for index in [0, 1, len(original.getInputNetworks())-1]:
+            assert compareNetworkFrames([original._getCompressedNetworkAt(index)], [mapped._getCompressedNetworkAt(index, False)])
+    finally:
+        shutil.rmtree(directory)
+
+def frame_cache_test():
+    frames = NetworkFrames.NetworkFrames(cacheSize=2)
+    frames.readGraphML('BarabasiAlbert.graphML')
+    frames.setCheckpointInterval(10)
+    first = frames.getInputNetworkAt(5, False)
+    second = frames.getInputNetworkAt(5, False)
+    assert first.node is second.node
+    frames.getInputNetworkAt(6, False)
+    frames.getInputNetworkAt(7, False)
+    # Frame 5 was the least recently used and has been evicted
+    assert frames.getInputNetworkAt(5, False).node is not first.node
+    statistics = frames.getCacheStatistics()
+    assert statistics['hits'] == 1 and statistics['misses'] == 4 and statistics['size'] == 2
+    frames.readGraphML('ErdosRenyi.graphML')
+    assert frames.getCacheStatistics()['size'] == 0
+
+def read_only_view_test():
+    import networkx as nx
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('BarabasiAlbert.graphML')
+    frames.compressNetworkFrames()
+    stored = frames.inputFrames[3]
+    view = frames.getInputNetworkAt(3, False)
+    assert view.node is stored.node and view.edge is stored.edge
+    try:
+        view.add_node(-1)
+        assert False
+    except nx.NetworkXError:
+        pass
+    copied = view.copy()
+    copied.add_node(-1)
+    assert type(copied) is type(stored)
+    assert -1 not in stored.node
+    assert compareNetworkFrames([frames._getCompressedNetworkAt(5)], [frames._getCompressedNetworkAt(5, False)])
+
+def extraction_subgraph_test():
+    frames = NetworkFrames.NetworkFrames()
+    frames.readGraphML('StateBasedNetwork.graphML')
+    frames.compressNetworkFrames()
+    assert len(frames.getExtractionSubgraphs()) == len(frames._getCompressedNetworks()) - 1
+    subgraph = frames.getExtractionSubgraphOfFrame(4)
+    assert subgraph.node is frames.getExtractionSubgraphs()[3].node
+    delta = frames._getCompressedNetworkAt(4, False)
+    for node in subgraph.nodes_iter():
+        assert NetworkFrames.compressState.tag not in subgraph.node[node]
+        assert delta.node[node][NetworkFrames.compressState.tag] != NetworkFrames.compressState.added
+    streamed = NetworkFrames.NetworkFrames()
+    streamed.ingestGraphML('StateBasedNetwork.graphML')
+    assert compareNetworkFrames(frames.getExtractionSubgraphs(), streamed.getExtractionSubgraphs())
+
+def decompress_collision_test():
+    import networkx as nx
+    frames = NetworkFrames.NetworkFrames()
+    tag = NetworkFrames.compressState.tag
+    focus = nx.Graph()
+    focus.add_nodes_from([(1, {'state': 0}), (2, {'state': 0}), (5, {'state': 1})])
+    focus.add_edge(1, 2)
+    change = nx.Graph()
+    change.add_node(2, {tag: NetworkFrames.compressState.added, 'state': 1})
+    change.add_node(1, {tag: NetworkFrames.compressState.none, 'state': 0})
+    change.add_edge(1, 2, {tag: NetworkFrames.compressState.added})
+    frames._decompress(focus, change)
+    assert focus.node[6] == {'state': 1}
+    assert focus.has_edge(1, 6) and tag not in focus.edge[1][6]
+    # The change frame is left untouched
+    assert change.node[2][tag] == NetworkFrames.compressState.added
+    assert change.edge[1][2][tag] == NetworkFrames.compressState.added
+
+def centrality_mode_test():
+    import random
+    random.seed(0)
+    for graphMLPath in ['digraph.graphML', 'randBinaryState.graphML']:
+        processed = {}
+        for mode in NetworkFrames.centralityMode.allModes:
+            frames = NetworkFrames.NetworkFrames()
+            frames.readGraphML(graphMLPath)
+            frames.processNetworkFrames(mode, 0.2)
+            processed[mode] = frames.processedFrames
+        for exactFrame, incrementalFrame, approximateFrame in zip(*[processed[mode] for mode in NetworkFrames.centralityMode.allModes]):
+            scale = max((len(exactFrame) - 1) * (len(exactFrame) - 2), 1)
+            for node, data in exactFrame.nodes_iter(data=True):
+                for statistic, value in data.iteritems():
+                    assert abs(incrementalFrame.node[node][statistic] - value) < 1e-9
+                    if statistic == NetworkFrames.processState.betweenness:
+                        assert abs(approximateFrame.node[node][statistic] - value) / scale <= 0.2
+                    else:
+                        assert abs(approximateFrame.node[node][statistic] - value) < 1e-9
+
+def parallel_processing_test():
+    for graphMLPath in ['digraph.graphML', 'randBinaryState.graphML']:
+        serial = NetworkFrames.NetworkFrames()
+        serial.readGraphML(graphMLPath)
+        serial.processNetworkFrames()
+        parallel = NetworkFrames.NetworkFrames()
+        parallel.readGraphML(graphMLPath)
+        parallel.processNetworkFrames(NetworkFrames.centralityMode.incremental, workers=3)
+        assert len(serial.processedFrames) == len(parallel.processedFrames)
+        for serialFrame, parallelFrame in zip(serial.processedFrames, parallel.processedFrames):
+            assert serialFrame.name == parallelFrame.name
+            assert sorted(serialFrame.edges()) == sorted(parallelFrame.edges())
+            for node, data in serialFrame.nodes_iter(data=True):
+                assert sorted(data) == sorted(parallelFrame.node[node])
+                for statistic, value in data.iteritems():
+                    assert type(parallelFrame.node[node][statistic]) == type(value)
+                    assert parallelFrame.node[node][statistic] == value or abs(parallelFrame.node[node][statistic] - value) < 1e-9
+
+def extraction_classes_test():
+    from PyGNA import Utility
+    util = Utility.utility()
+    original = NetworkFrames.NetworkFrames()
+    original.readGraphML('StateBasedNetwork.graphML')
+    original.compressNetworkFrames()
+    classes = original.getExtractionClasses()
+    subgraphs = original.getExtractionSubgraphs()
+    assert len(classes) == len(subgraphs)
+    for index, representative in enumerate(classes):
+        assert representative <= index and classes[representative] == representative
+        assert util.isIsomorphic(subgraphs[representative], subgraphs[index])
+        assert not any(util.isIsomorphic(subgraphs[other], subgraphs[index])
+                       for other in set(classes[:representative]))
+    original.saveFrames('frames.npz')
+    archived = NetworkFrames.NetworkFrames()
+    archived.loadFrames('frames.npz')
+    os.remove('frames.npz')
+    assert archived.extractionClasses == classes
+    assert archived.getExtractionClasses() == classes
+
 def compareNetworkFrames(firstFrames, secondFrames):
     returnValue = True
     frameIndex = 0
@@ -0,0 +1,31 @@
+from PyGNA import Sampling
+import random
+
+def alias_sampler_test():
+    random.seed(1)
+    weights = [1, 3, 0, 2, 0.5]
+    sampler = Sampling.AliasSampler(weights)
+    counts = [0] * len(weights)
+    for _ in range(65000):
+        counts[sampler.draw()] += 1
+    assert counts[2] == 0
+    for index, weight in enumerate(weights):
+        assert abs(counts[index] / 65000. - weight / 6.5) < 0.01
+
+def fenwick_sampler_test():
+    random.seed(2)
+    sampler = Sampling.FenwickSampler([4, 0, 1, 5])
+    assert sampler.getTotal() == 10
+    sampler.update(3, 0)
+    counts = [0] * 4
+    for _ in range(10000):
+        counts[sampler.draw()] += 1
+    assert counts[1] == 0 and counts[3] == 0
+    assert abs(counts[0] / 10000. - 0.8) < 0.02
+    sampler.update(0, 0)
+    sampler.update(2, 0)
+    try:
+        sampler.draw()
+        assert False
+    except ValueError:
+        pass
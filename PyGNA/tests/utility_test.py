@@ -0,0 +1,45 @@
+import networkx as nx
+from PyGNA import Utility
+
+def subgraph_instances_test():
+    G = nx.complete_graph(4)
+    G.add_edge(3, 4)
+    for node in G.nodes():
+        G.node[node]['state'] = 0
+    triangle = G.subgraph([0, 1, 2])
+    edges = sorted(G.edges())
+    instances = Utility.utility().findSubgraphInstances(G, triangle)
+    # One instance per triangle once the symmetries are broken, and the host graph is left as it was
+    assert sorted(sorted(instance.values()) for instance in instances) == [[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]]
+    assert sorted(G.edges()) == edges and len(G) == 5
+    assert len(Utility.utility().findSubgraphInstances(G, triangle, False)) == 24
+
+def subgraph_instance_limit_test():
+    # Far deeper than the default recursion limit
+    G = nx.path_graph(1200)
+    instances = list(Utility.utility().iterSubgraphInstances(G, G, 1, False))
+    assert len(instances) == 1 and len(instances[0]) == 1200
+    assert list(Utility.utility().iterSubgraphInstances(G, G.subgraph([0, 1]), 0)) == []
+
+def directed_subgraph_instances_test():
+    G = nx.DiGraph([(0, 1), (1, 2), (2, 0), (2, 3), (3, 1)])
+    cycle = nx.DiGraph([('a', 'b'), ('b', 'c'), ('c', 'a')])
+    instances = Utility.utility().findSubgraphInstances(G, cycle, False)
+    assert sorted(sorted(instance.values()) for instance in instances) == [[0, 1, 2]] * 3 + [[1, 2, 3]] * 3
+
+def canonical_certificate_test():
+    util = Utility.utility()
+    G = nx.Graph([(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)])
+    for node in G.nodes():
+        G.node[node]['state'] = node % 2
+    H = nx.relabel_nodes(G, {0: 'c', 1: 'a', 2: 'd', 3: 'b'})
+    assert util.canonicalCertificate(G) == util.canonicalCertificate(H)
+    assert util.isIsomorphic(G, H) and util.isIsomorphicFast(G, H)
+    mapping = dict(zip(H.nodes(), util.isIsomorphic(G, H, True)))
+    assert all(G.has_edge(mapping[start], mapping[end]) for start, end in H.edges())
+    H.node['a']['state'] = 0
+    assert not util.isIsomorphic(G, H) and util.isIsomorphic(G, H, True) == []
+    K = G.copy()
+    G.edge[0][1]['weight'] = 1
+    K.edge[0][2]['weight'] = 1
+    assert util.isIsomorphic(G, K) and not util.isIsomorphicFast(G, K)